@@ -32,7 +32,8 @@ class AutosarkasmusBot:
         self.oauth.set_access_token(self.ACCESS_KEY, self.ACCESS_SECRET)
         self.twitter_api = tweepy.API(self.oauth)
         # tweet processing
-        self.pipeline = Pipeline(self.training_corpus_positive_path, self.pipeline_tagger_mapping_path)
+        self.pipeline = Pipeline(self.training_corpus_positive_path, self.pipeline_tagger_mapping_path, tagger_processes=self.pipeline_tagger_processes, processed_cache_path=False, normalizer_model_path=self.normalizer_model_path) # live tweets are rarely repeated
+        self.pipeline.warmup() # load tagger, dictionary and normalizer model in the background
         self.feature_extractor = FeatureExtractor(self.features, self.feature_order)
         self.classifier = MultiLayerPerceptronClassifier(self.feature_order, verbose=self.verbose)
 
@@ -59,9 +60,12 @@ class AutosarkasmusBot:
         self.ACCESS_KEY = config_json.get('ACCESS_KEY', None) # Twitter API application access key
         self.ACCESS_SECRET = config_json.get('ACCESS_SECRET', None) # Twitter API application secret key
         self.pipeline_tagger_mapping_path = config_json.get('PIPELINE_TAGGER_MAPPING_PATH', None) # path to tagger mapping file
+        self.pipeline_tagger_processes = config_json.get('PIPELINE_TAGGER_PROCESSES', 1) # number of TreeTagger processes (more than 1 restarts hung taggers)
         self.training_corpus_positive_path = config_json.get('TRAINING_CORPUS_POSITIVE_PATH', None) # path to corpus with positive training data
         self.training_corpus_negative_path = config_json.get('TRAINING_CORPUS_NEGATIVE_PATH', None) # path to corpus with negative training data
         self.history_path = config_json.get('HISTORY_PATH', None) # path to the bot's history
+        self.normalizer_online_learning = config_json.get('NORMALIZER_ONLINE_LEARNING', False) # whether enquiries are used to adapt the normalizer
+        self.normalizer_model_path = config_json.get('NORMALIZER_MODEL_PATH', None) # path to the (adapted) normalizer model, the bot resumes from its snapshots
         # load history to memory
         self.history = {}
         try:
@@ -99,6 +103,8 @@ class AutosarkasmusBot:
         if self.verbose: print('classifying tweet: "' + tweet_raw + '"')
         tweet_tkn, tweet_proc = self.pipeline.process_tweet(tweet_raw) # preprocess the raw tweet
         if self.verbose: print(str(tweet_tkn) + '\n' + str(tweet_proc))
+        if self.normalizer_online_learning:
+            self.pipeline.learn([tweet_tkn]) # adapt the normalizer to the language of incoming enquiries
         tweet_ext = self.feature_extractor.extract_features_from_tweet(tweet_tkn, tweet_proc, True) # extract features from tweet (sarcasm is True per default)
         del(tweet_ext['class']) # delete class since it is only a default value
         if self.verbose: print([(feature, tweet_ext[feature]) for feature in self.feature_order if tweet_ext.get(feature, 0) != 0 ]) # print all features != 0
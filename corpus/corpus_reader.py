@@ -38,19 +38,21 @@ class CorpusReader:
 
     def text_json(self):
         '''	Takes a json file and returns a list containing the value of the text attribute in a tweet'''
-        tweets = []
-        for o in self.iterload():
-            tweets.append(o['text'])
-
-        return tweets
+        return list(self.iter_text_json())
 
     def text_txt(self):
         '''Takes a txt file and returns a list containing the value of the text attribute in a tweet'''
-        tweets = []
+        return list(self.iter_text_txt())
+
+    def iter_text_json(self):
+        '''Takes a json file and yields the value of the text attribute of one tweet after the other'''
+        for o in self.iterload():
+            yield o['text']
+
+    def iter_text_txt(self):
+        '''Takes a txt file and yields the value of the text attribute of one tweet after the other'''
         for line in reader(self.this_file):
-            tweets.append(line[2].strip())
-        
-        return tweets
+            yield line[2].strip()
         
 
     def date_id_text(self):
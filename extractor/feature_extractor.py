@@ -147,13 +147,14 @@ class FeatureExtractor():
         # extract features
         if verbose: print('extracting features...')
 
+        # one normalizer (trained on both corpora) and tagger serve both pipelines
+        pipeline_pos = Pipeline(corpus_file_pos, '../rsrc/de-tiger.map', verbose=verbose, training_corpus_paths=[corpus_file_pos, corpus_file_neg])
+        pipeline_neg = Pipeline(corpus_file_neg, '../rsrc/de-tiger.map', verbose=verbose, shared_pipeline=pipeline_pos)
+
         for is_sarcastic in [True, False]:
             if verbose: print('   preprocessing samples with sarcastic='+str(is_sarcastic)+'...')
             # preprocess tweets
-            if is_sarcastic:
-                pipeline = Pipeline(corpus_file_pos, '../rsrc/de-tiger.map', verbose=verbose)
-            else:
-                pipeline = Pipeline(corpus_file_neg, '../rsrc/de-tiger.map', verbose=verbose)
+            pipeline = pipeline_pos if is_sarcastic else pipeline_neg
             tweets_tkn, tweets_proc = pipeline.process()
             if verbose: print('   extracting features...')
             # extract features from tweets
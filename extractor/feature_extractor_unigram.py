@@ -19,7 +19,7 @@ from unigram_helpers import load_unigrams
 
 
 def setup_features():
-	 '''Setup the features by using the unigram_helpers: unigrams'''
+    '''Setup the features by using the unigram_helpers: unigrams'''
     features = {}
     feature_order = []
     feature_order += load_unigrams()
@@ -80,8 +80,8 @@ if __name__ == '__main__':
         ext_features = extract_features(tweets_tkn[tweet_index], tweets_proc[tweet_index], True, features, feature_order, resources)
         arff_doc.add_data(ext_features)
     print('   writing to files (for safety)...')
-    pipeline.write_file(tweets_tkn, args.corpus_file_pos + '.tkn')
-    pipeline.write_file(tweets_proc, args.corpus_file_pos + '.proc')
+    pipeline.write_binary(tweets_tkn, args.corpus_file_pos + '.tkn.bin')
+    pipeline.write_binary(tweets_proc, args.corpus_file_pos + '.proc.bin')
     arff_doc.generate_document(args.output_file + '.pos')
 
     print('   preprocessing negative samples...')
@@ -91,8 +91,8 @@ if __name__ == '__main__':
     for tweet_index in range(len(tweets_tkn)):
         ext_features = extract_features(tweets_tkn[tweet_index], tweets_proc[tweet_index], False, features, feature_order, resources)
         arff_doc.add_data(ext_features)
-    pipeline.write_file(tweets_tkn, args.corpus_file_neg + '.tkn')
-    pipeline.write_file(tweets_proc, args.corpus_file_neg + '.proc')
+    pipeline.write_binary(tweets_tkn, args.corpus_file_neg + '.tkn.bin')
+    pipeline.write_binary(tweets_proc, args.corpus_file_neg + '.proc.bin')
     arff_doc.generate_document(args.output_file + '.neg')
 
     #
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+'''
+Normalizer (command line)
+
+Trains the context model of the normalizer on one or more corpus files:
+
+    $ python -m autosarkasmus.preprocessor.normalizer train -w 8 -o tweets.nrm ../corpus/txt/tweets_*.txt
+'''
+import argparse
+import time
+
+from autosarkasmus.preprocessor.normalizer.normalizer import default_model_path
+from autosarkasmus.preprocessor.normalizer.training import train
+
+if __name__ == '__main__':
+    # argument parsing
+    arg_parser = argparse.ArgumentParser(prog='python -m autosarkasmus.preprocessor.normalizer', description='Normalizer Model Training')
+    arg_subparsers = arg_parser.add_subparsers(dest='command')
+    arg_train = arg_subparsers.add_parser('train', help='count unigrams/bigrams of corpus files and store the model')
+    arg_train.add_argument('corpus_files', nargs='+', help='paths to the corpus files (one shard per file)')
+    arg_train.add_argument('-o', '--output', help='path to the model file (default: see normalizer.default_model_path, e.g. first corpus file + ".nrm" for a single file)')
+    arg_train.add_argument('-w', '--workers', type=int, default=1, help='number of worker processes')
+    arg_train.add_argument('--json', action='store_true', help='corpora are raw JSON-dumps instead of csv files')
+    arg_train.add_argument('--sketch-width', type=int, default=0, help='use a count-min sketch of this width instead of exact counts')
+    arg_train.add_argument('--sketch-depth', type=int, default=4, help='depth of the count-min sketch')
+    args = arg_parser.parse_args()
+
+    if args.command != 'train':
+        arg_parser.print_help()
+    else:
+        output_path = args.output or default_model_path(args.corpus_files)
+        start = time.time()
+        train(args.corpus_files, workers=args.workers, json_corpus=args.json, sketch_width=args.sketch_width, sketch_depth=args.sketch_depth, output_path=output_path)
+        print('trained on %d corpus files in %.1fs' % (len(args.corpus_files), time.time() - start))
+        print('model stored at "%s"' % output_path)
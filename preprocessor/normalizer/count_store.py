@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+import zlib
+import struct
+import hashlib
+from array import array
+
+EMPTY = 0 # bigram keys are never 0 since the right token of a bigram is never None
+STORE_HEADER = struct.Struct('<IIIIId') # vocabulary size, vocabulary bytes, token table capacity, bigram table capacity, bigrams, scale
+MIN_SCALE = 1e-100 # below, the scale is folded into the counts (see CountStore.decay)
+
+def _to_array(typecode, values):
+    """
+    returns a writable array of an array or a (read-only) memoryview
+    """
+    if isinstance(values, array):
+        return values
+    res = array(typecode)
+    res.frombytes(values.cast('B'))
+    return res
+
+def _token_table(tokens):
+    """
+    builds an open-addressing table of token ids (1-based, 0 marks an empty slot) keyed by the crc32 of the utf-8 tokens
+    input: list of utf-8 encoded tokens in id order
+    output: array of int32 (capacity is a power of 2 with a load factor of at most 0.5)
+    """
+    capacity = 1
+    while capacity < 2 * len(tokens):
+        capacity *= 2
+    slots = array('i', bytes(4 * capacity))
+    mask = capacity - 1
+    for token_id, token in enumerate(tokens, 1):
+        slot = zlib.crc32(token) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = token_id
+    return slots
+
+class CountStore:
+    def __init__(self, capacity=1024):
+        """
+        CountStore: compact unigram/bigram counts with interned tokens (capacity of the bigram table must be a power of 2)
+
+        Tokens are mapped to int32 ids (0 is reserved for None, i.e. the tweet boundary).
+        Unigram counts are stored in an array indexed by token id, bigram counts in an
+        open-addressing hash table of (left id << 32 | right id) keys backed by two arrays.
+        Lookups never modify the store and return add-1 smoothed counts.
+
+        Counts are float64 and relative to a common scale (count = stored value * scale), so decay only changes
+        the scale (O(1)) and decayed counts are exact instead of rounded.
+
+        Stores read from a model file (see read) use the arrays of the memory map in place and look tokens up
+        in its hash table, so loading is independent of the model size. They are copied into memory on the first change.
+        """
+        self.vocab = {}
+        self._mapped = None # (token offsets, token blob, token table) of a memory-mapped store whose vocab is not loaded
+        self.unigram_counts = array('d', [0.]) # id 0: None
+        self.bigram_keys = array('q', bytes(8 * capacity))
+        self.bigram_counts = array('d', bytes(8 * capacity))
+        self.bigram_size = 0
+        self.scale = 1.0
+
+    def _intern(self, token):
+        """
+        returns the id of a token, assigning a new one if it is unknown
+        """
+        if token is None:
+            return 0
+        if self._mapped is not None:
+            self._materialize()
+        token_id = self.vocab.get(token)
+        if token_id is None:
+            token_id = len(self.unigram_counts)
+            self.vocab[token] = token_id
+            self.unigram_counts.append(0.)
+        return token_id
+
+    def _token_id(self, token):
+        """
+        returns the id of a token or None if it is unknown (without loading the vocabulary of a mapped store)
+        """
+        if self._mapped is None:
+            return self.vocab.get(token)
+        offsets, blob, slots = self._mapped
+        token = token.encode('utf8', 'surrogatepass')
+        mask = len(slots) - 1
+        slot = zlib.crc32(token) & mask
+        while slots[slot]:
+            token_id = slots[slot]
+            if blob[offsets[token_id-1]:offsets[token_id]] == token:
+                return token_id
+            slot = (slot + 1) & mask
+        return None
+
+    def _materialize(self):
+        """
+        copies a memory-mapped store into memory so that it can be changed
+        """
+        offsets, blob, slots = self._mapped
+        blob = bytes(blob)
+        self.vocab = {blob[offsets[i]:offsets[i+1]].decode('utf8', 'surrogatepass'): i+1 for i in range(len(offsets)-1)}
+        self.unigram_counts = _to_array('d', self.unigram_counts)
+        self.bigram_keys = _to_array('q', self.bigram_keys)
+        self.bigram_counts = _to_array('d', self.bigram_counts)
+        self._mapped = None
+
+    def _slot(self, key):
+        """
+        returns the position of a bigram key in the table (or the empty slot it would be inserted at)
+        """
+        keys = self.bigram_keys
+        mask = len(keys) - 1
+        slot = ((key * 11400714819323198485) >> 32) & mask # fibonacci hashing
+        while keys[slot] != key and keys[slot] != EMPTY:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _resize(self):
+        """
+        doubles the capacity of the bigram table
+        """
+        keys, counts = self.bigram_keys, self.bigram_counts
+        self.bigram_keys = array('q', bytes(16 * len(keys)))
+        self.bigram_counts = array('d', bytes(16 * len(counts)))
+        for key, count in zip(keys, counts):
+            if key != EMPTY:
+                slot = self._slot(key)
+                self.bigram_keys[slot] = key
+                self.bigram_counts[slot] = count
+
+    def add_unigram(self, token, count=1):
+        """
+        increases the count of a token
+        """
+        token_id = self._intern(token) # interning copies a mapped store into memory
+        self.unigram_counts[token_id] += count / self.scale
+
+    def add_bigram(self, left, right, count=1):
+        """
+        increases the count of the bigram (left, right)
+        """
+        key = (self._intern(left) << 32) | self._intern(right) # interning copies a mapped store into memory
+        slot = self._slot(key)
+        if self.bigram_keys[slot] == EMPTY:
+            self.bigram_keys[slot] = key
+            self.bigram_size += 1
+        self.bigram_counts[slot] += count / self.scale
+        if self.bigram_size * 10 > len(self.bigram_keys) * 7: # keep the load factor below 0.7
+            self._resize()
+
+    def add_context(self, token, context):
+        """
+        counts a token and its bigrams with the (previous, following) tokens of its context
+        """
+        self.add_unigram(token)
+        self.add_bigram(context[0], token)
+        self.add_bigram(token, context[1])
+
+    def merge(self, other):
+        """
+        adds all counts of another CountStore
+        """
+        for token, count in other.unigrams():
+            self.add_unigram(token, count)
+        for (left, right), count in other.bigrams():
+            self.add_bigram(left, right, count)
+
+    def decay(self, factor):
+        """
+        multiplies all counts by a factor (exponential decay of old counts, O(1) since only the scale changes)
+        """
+        self.scale *= factor
+        if self.scale < MIN_SCALE: # new counts would be added as huge values, fold the scale into the counts (rarely, O(counts))
+            if self._mapped is not None:
+                self._materialize()
+            self.unigram_counts = array('d', (count * self.scale for count in self.unigram_counts))
+            self.bigram_counts = array('d', (count * self.scale for count in self.bigram_counts))
+            self.scale = 1.0
+
+    def copy(self):
+        """
+        returns an independent copy of the store (a mapped store shares the read-only map)
+        """
+        res = CountStore(capacity=1)
+        res.vocab = self.vocab.copy() if self.vocab is not None else None
+        res._mapped = self._mapped
+        if self._mapped is None:
+            res.unigram_counts = self.unigram_counts[:]
+            res.bigram_keys = self.bigram_keys[:]
+            res.bigram_counts = self.bigram_counts[:]
+        else:
+            res.unigram_counts, res.bigram_keys, res.bigram_counts = self.unigram_counts, self.bigram_keys, self.bigram_counts
+        res.bigram_size = self.bigram_size
+        res.scale = self.scale
+        return res
+
+    def unigram(self, token):
+        """
+        returns the add-1 smoothed count of a token
+        """
+        if token is None:
+            return 1.0
+        token_id = self._token_id(token)
+        if token_id is None:
+            return 1.0
+        return 1.0 + self.unigram_counts[token_id] * self.scale
+
+    def bigram(self, left, right):
+        """
+        returns the add-1 smoothed count of the bigram (left, right)
+        """
+        left_id = 0 if left is None else self._token_id(left)
+        right_id = 0 if right is None else self._token_id(right)
+        if left_id is None or right_id is None:
+            return 1.0
+        return 1.0 + self.bigram_counts[self._slot((left_id << 32) | right_id)] * self.scale
+
+    def _tokens(self):
+        """
+        returns the list of tokens indexed by their ids (None for id 0)
+        """
+        if self._mapped is None:
+            return [None] + list(self.vocab)
+        offsets, blob, slots = self._mapped
+        return [None] + [str(blob[offsets[i]:offsets[i+1]], 'utf8', 'surrogatepass') for i in range(len(offsets)-1)]
+
+    def unigrams(self):
+        """
+        iterates over all (token, count) pairs
+        """
+        for token_id, token in enumerate(self._tokens()):
+            if token_id:
+                yield token, self.unigram_counts[token_id] * self.scale
+
+    def bigrams(self):
+        """
+        iterates over all ((left, right), count) pairs
+        """
+        tokens = self._tokens()
+        for key, count in zip(self.bigram_keys, self.bigram_counts):
+            if key != EMPTY:
+                yield (tokens[key >> 32], tokens[key & 0xFFFFFFFF]), count * self.scale
+
+    def write(self, fop):
+        """
+        writes the store to a binary file object
+        layout: header, token byte offsets (uint32), utf-8 token blob, token table (int32, see _token_table), unigram counts (float64),
+        bigram keys (int64), bigram counts (float64)
+        """
+        if self._mapped is None:
+            tokens = [token.encode('utf8', 'surrogatepass') for token in self.vocab] # dicts preserve insertion order, i.e. the token ids
+            offsets = array('I', [0])
+            for token in tokens:
+                offsets.append(offsets[-1] + len(token))
+            blob = b''.join(tokens)
+            slots = _token_table(tokens)
+        else:
+            offsets, blob, slots = self._mapped
+        fop.write(STORE_HEADER.pack(len(offsets) - 1, len(blob), len(slots), len(self.bigram_keys), self.bigram_size, self.scale))
+        for data in [offsets, blob, slots, self.unigram_counts, self.bigram_keys, self.bigram_counts]:
+            fop.write(data)
+
+    @classmethod
+    def read(cls, data, position=0):
+        """
+        reads a store written by write() from a buffer (e.g. an mmap, which must stay open) starting at position
+        the arrays are views of the buffer, nothing is copied or decoded
+        """
+        n_vocab, n_blob, n_slots, capacity, n_bigrams, scale = STORE_HEADER.unpack_from(data, position)
+        position += STORE_HEADER.size
+        view = memoryview(data)
+        arrays = []
+        for typecode, length in [('I', n_vocab+1), ('B', n_blob), ('i', n_slots), ('d', n_vocab+1), ('q', capacity), ('d', capacity)]:
+            size = length * array(typecode).itemsize
+            arrays.append(view[position:position+size].cast(typecode))
+            position += size
+        offsets, blob, slots, unigram_counts, bigram_keys, bigram_counts = arrays
+        store = cls(capacity=1)
+        store.vocab = None
+        store._mapped = (offsets, blob, slots)
+        store.unigram_counts, store.bigram_keys, store.bigram_counts = unigram_counts, bigram_keys, bigram_counts
+        store.bigram_size = n_bigrams
+        store.scale = scale
+        return store
+
+
+SKETCH_HEADER = struct.Struct('<IId') # width, depth, scale
+
+class SketchCountStore:
+    def __init__(self, width=1 << 20, depth=4):
+        """
+        SketchCountStore: approximate unigram/bigram counts in fixed memory (count-min sketch)
+
+        Uses the interface of CountStore, but memory is fixed to width * depth float64 counters,
+        independent of the size of the training data. Counts can only be overestimated; conservative
+        updates keep the error small. Hashes are stable across processes so sketches can be persisted.
+        Like in CountStore, counters are relative to a common scale, so decay is O(1) and exact.
+        """
+        self.width = width
+        self.depth = depth
+        self.table = array('d', bytes(8 * width * depth))
+        self.scale = 1.0
+
+    def _cells(self, key):
+        """
+        returns the counter positions of a key (one per row, double hashing)
+        """
+        digest = hashlib.blake2b(key.encode('utf8', 'surrogatepass'), digest_size=16).digest()
+        hash_a = int.from_bytes(digest[:8], 'little')
+        hash_b = int.from_bytes(digest[8:], 'little') | 1
+        return [row * self.width + (hash_a + row * hash_b) % self.width for row in range(self.depth)]
+
+    def _add(self, key, count):
+        """
+        conservative update: only raises the counters that are below the new estimate
+        """
+        if not isinstance(self.table, array): # counters of a memory-mapped sketch are copied on the first change
+            self.table = _to_array('d', self.table)
+        cells = self._cells(key)
+        estimate = min(self.table[cell] for cell in cells) + count / self.scale
+        for cell in cells:
+            if self.table[cell] < estimate:
+                self.table[cell] = estimate
+
+    def _get(self, key):
+        """
+        returns the (over-)estimated count of a key
+        """
+        return min(self.table[cell] for cell in self._cells(key)) * self.scale
+
+    def add_unigram(self, token, count=1):
+        """
+        increases the count of a token
+        """
+        self._add('1' + token, count)
+
+    def add_bigram(self, left, right, count=1):
+        """
+        increases the count of the bigram (left, right)
+        """
+        self._add('2' + (left or '') + '\x00' + (right or ''), count) # None is encoded as the empty string (tokens are never empty)
+
+    def add_context(self, token, context):
+        """
+        counts a token and its bigrams with the (previous, following) tokens of its context
+        """
+        self.add_unigram(token)
+        self.add_bigram(context[0], token)
+        self.add_bigram(token, context[1])
+
+    def merge(self, other):
+        """
+        adds all counts of another sketch of the same dimensions (sketches are merged by adding their counters)
+        """
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("sketches of different dimensions can not be merged")
+        ratio = other.scale / self.scale
+        self.table = array('d', (count + other_count * ratio for count, other_count in zip(self.table, other.table)))
+
+    def decay(self, factor):
+        """
+        multiplies all counters by a factor (exponential decay of old counts, O(1) since only the scale changes)
+        """
+        self.scale *= factor
+        if self.scale < MIN_SCALE: # fold the scale into the counters (rarely, O(width * depth))
+            self.table = array('d', (count * self.scale for count in self.table))
+            self.scale = 1.0
+
+    def copy(self):
+        """
+        returns an independent copy of the sketch
+        """
+        res = SketchCountStore(width=1, depth=1)
+        res.width, res.depth = self.width, self.depth
+        res.table = self.table[:]
+        res.scale = self.scale
+        return res
+
+    def unigram(self, token):
+        """
+        returns the add-1 smoothed count of a token
+        """
+        if token is None:
+            return 1.0
+        return 1.0 + self._get('1' + token)
+
+    def bigram(self, left, right):
+        """
+        returns the add-1 smoothed count of the bigram (left, right)
+        """
+        return 1.0 + self._get('2' + (left or '') + '\x00' + (right or ''))
+
+    def write(self, fop):
+        """
+        writes the sketch to a binary file object
+        layout: header, counters (float64)
+        """
+        fop.write(SKETCH_HEADER.pack(self.width, self.depth, self.scale))
+        fop.write(self.table)
+
+    @classmethod
+    def read(cls, data, position=0):
+        """
+        reads a sketch written by write() from a buffer (e.g. an mmap, which must stay open) starting at position
+        the counters are a view of the buffer until they are changed
+        """
+        width, depth, scale = SKETCH_HEADER.unpack_from(data, position)
+        position += SKETCH_HEADER.size
+        store = cls(width=1, depth=1)
+        store.width, store.depth, store.scale = width, depth, scale
+        store.table = memoryview(data)[position:position + 8 * width * depth].cast('d')
+        return store
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Lexicon (functions)
+
+Builds an in-memory word list from a hunspell dictionary for fast known-word checks.
+"""
+
+# affix file options marking dictionary entries that are not valid words on their own
+RESTRICTING_FLAGS = ["NEEDAFFIX", "PSEUDOROOT", "ONLYINCOMPOUND", "FORBIDDENWORD"]
+
+def parse_flags(flags, flag_type):
+    """
+    splits a flag string according to the FLAG option of the affix file (default: single characters)
+    """
+    if flag_type == "long":
+        return [flags[i:i+2] for i in range(0, len(flags), 2)]
+    if flag_type == "num":
+        return flags.split(",")
+    return list(flags)
+
+def load_lexicon(dic_path, aff_path, wordlist_path=None):
+    """
+    loads all words of a hunspell dictionary which are valid on their own
+    input: paths to the .dic and .aff files, optional path to a list of expanded word forms (one per line, e.g. the output of hunspell's unmunch)
+    output: frozenset of words (only words which can be encoded in latin-1 are included, see Normalizer.oov)
+
+    Affixes are not expanded, i.e. inflected forms which are missing from the word list still require a dictionary lookup.
+    """
+    encoding = "utf8"
+    flag_type = None
+    restricted = set()
+    with open(aff_path, "r", encoding="latin-1") as fop: # options are ascii, the encoding of the dictionary is set by SET
+        for line in fop:
+            line_parts = line.split()
+            if len(line_parts) < 2:
+                continue
+            if line_parts[0] == "SET":
+                encoding = line_parts[1]
+            elif line_parts[0] == "FLAG":
+                flag_type = line_parts[1]
+            elif line_parts[0] in RESTRICTING_FLAGS:
+                restricted.add(line_parts[1])
+    res = set()
+    files = [(dic_path, encoding, True)]
+    if wordlist_path:
+        files.append((wordlist_path, "utf8", False))
+    for path, path_encoding, is_dictionary in files:
+        with open(path, "r", encoding=path_encoding, errors="ignore") as fop:
+            if is_dictionary:
+                next(fop, None) # first line contains the number of entries
+            for line in fop:
+                line_parts = line.split()
+                if not line_parts:
+                    continue
+                word, _, flags = line_parts[0].partition("/")
+                if is_dictionary and restricted.intersection(parse_flags(flags, flag_type)):
+                    continue
+                try:
+                    word.encode("latin-1")
+                except UnicodeEncodeError:
+                    continue
+                res.add(word)
+    return frozenset(res)
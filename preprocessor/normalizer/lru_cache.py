@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+class LRUCache:
+    def __init__(self, max_size):
+        """
+        LRUCache: bounded mapping which evicts the least recently used entries and counts hits/misses
+
+        None can not be stored as a value since get() returns None for missing keys.
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        returns the value of a key or None
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        stores a value and evicts the least recently used entry if necessary
+        """
+        if self.max_size <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        removes all entries (counters are kept)
+        """
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """
+        returns hit/miss counters, the hit rate and the current size
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0., 'size': len(self.entries)}
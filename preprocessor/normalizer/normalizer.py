@@ -1,10 +1,135 @@
 # -*- coding: utf-8 -*-
 import hunspell
 import re
-from collections import defaultdict
+import os
+import sys
+import mmap
+import struct
+import time
+import hashlib
+from itertools import product
+
+from autosarkasmus.preprocessor.normalizer.count_store import CountStore, SketchCountStore
+from autosarkasmus.preprocessor.normalizer.spelling_cache import SpellingCache
+from autosarkasmus.preprocessor.normalizer.lru_cache import LRUCache
+from autosarkasmus.preprocessor.normalizer.lexicon import load_lexicon
+from autosarkasmus.preprocessor.normalizer.spelling_backends import HunspellBackend, SymmetricDeleteBackend
+from autosarkasmus.preprocessor.tokenizer.tokenizer import TOKEN_HASHTAG, TOKEN_USER, TOKEN_WORD
+
+DICTIONARY_DIC = "../rsrc/hunspell/de_DE.dic"
+DICTIONARY_AFF = "../rsrc/hunspell/de_DE.aff"
+
+MODEL_MAGIC = b'ASNM'
+MODEL_VERSION = 5 # increase whenever the model layout or the tokenization of the training data changes
+MODEL_HEADER = struct.Struct('<4sIB20sB') # magic, version, byte order, corpus checksum, count store type
+COUNT_STORES = [CountStore, SketchCountStore] # count store types by id
+
+# replacement rules for twitter phenomena in descending priority (one named group per rule, see Normalizer.match_rule)
+RULES = re.compile("|".join([
+    r"#(?P<hashtag>\S+)", # hashtags: sanitize
+    r"(?P<mention>@\S+)", # @-mentions: delete content
+    r"(?P<smiley_pos>[:;x]'?-?[\)D])$", # smileys: neg/pos
+    r"(?P<smiley_neg>[:;]'?-?[\(<sSoO])$",
+    r"(?P<smiley>[:;]'?-?[^\)\(DsSoOcC<])$",
+    r"(?P<emoji>\\U0001F[0-9A-F]{3})", # escaped unicode emojis
+    r"(?P<url>(?:https?://)?(?:[a-z]+\.)?[a-z0-9-]+\.[a-z]+(?:\.[a-z]+)?(?:/\S*)*)", # URLs: sub
+    r"(?P<punctuation>[!\?,\.\-\_:;\(\)\[\]\{\}\+\=\~'\"]+)$" # punctuation: shorten to 3 characters
+]))
+RULE_PLACEHOLDERS = {'mention': "%MENTION%", 'smiley_pos': "%SMILEYPOS%", 'smiley_neg': "%SMILEYNEG%", 'smiley': "%SMILEY%", 'emoji': "%SMILEY%", 'url': "%URL%"}
+RULE_DETERMINER = re.compile(r"^('?n(en|e)?)$")
+VOWEL_RUNS = re.compile("[aA]{3,}|[eE]{3,}|[iI]{3,}|[oO]{3,}|[uU]{3,}|[äÄ]{3,}|[üÜ]{3,}|[öÖ]{3,}") # lengthened vowels
+
+def vowel_variants(token, max_runs=4):
+    """
+    enumerates all spellings of a token with its lengthened vowels collapsed to one or two characters
+    input: token, maximum number of vowel runs to consider (further runs are left as they are)
+    output: generator of at most 2**max_runs variants (all runs collapsed to a single vowel first)
+
+    Example:
+    input: "suuuper"
+    output: "super", "suuper"
+    """
+    runs = [match.span() for match in VOWEL_RUNS.finditer(token)][:max_runs]
+    for lengths in product((1, 2), repeat=len(runs)):
+        parts = []
+        position = 0
+        for (start, end), length in zip(runs, lengths):
+            parts.append(token[position:start+length])
+            position = end
+        parts.append(token[position:])
+        yield "".join(parts)
+
+def corpus_checksum(path):
+    """
+    computes the SHA-1 checksum of a corpus file (used to detect stale models)
+    """
+    checksum = hashlib.sha1()
+    with open(path, 'rb') as fop:
+        for chunk in iter(lambda: fop.read(1 << 20), b''):
+            checksum.update(chunk)
+    return checksum.digest()
+
+def corpora_checksum(paths):
+    """
+    computes the checksum of several corpus files (equal to corpus_checksum for a single file)
+    """
+    if len(paths) == 1:
+        return corpus_checksum(paths[0])
+    checksum = hashlib.sha1()
+    for path in paths:
+        checksum.update(corpus_checksum(path))
+    return checksum.digest()
+
+def default_model_path(paths):
+    """
+    returns the default path of the model trained on a set of corpus files
+    input: paths to the corpus files
+    output: first corpus file + ".nrm" for a single file, otherwise first corpus file + ".<hash of all paths>.nrm"
+    (models of different training sets never share a file)
+    """
+    if len(paths) == 1:
+        return paths[0] + '.nrm'
+    digest = hashlib.sha1('\n'.join(os.path.abspath(path) for path in paths).encode('utf8', 'surrogatepass')).hexdigest()
+    return paths[0] + '.' + digest[:12] + '.nrm'
+
+def save_counts(path, counts, checksum):
+    """
+    stores a count store in a versioned binary file
+    input: path to the model file, count store, checksum of the training corpus (see corpus_checksum)
+
+    the file is written to a temporary file which then replaces the model, so processes which mapped the
+    previous model (see load_counts) keep reading it and readers never see a partial model
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as fop:
+        fop.write(MODEL_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, sys.byteorder == 'little', checksum, COUNT_STORES.index(type(counts))))
+        counts.write(fop)
+    os.replace(temp_path, path)
+
+def load_counts(path, checksum=None, store_type=None):
+    """
+    loads a count store stored by save_counts() via mmap
+    input: path to the model file, checksum of the training corpus (None accepts any corpus), expected count store class (None accepts any)
+    output: count store or None if the model is missing, outdated or does not match
+
+    the store reads its counts from the map, which stays open as long as the store uses it (loading time does not depend on the model size)
+    """
+    try:
+        with open(path, 'rb') as fop:
+            data = mmap.mmap(fop.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): # missing or empty file
+        return None
+    if len(data) >= MODEL_HEADER.size:
+        magic, version, little_endian, model_checksum, store_id = MODEL_HEADER.unpack_from(data)
+        if (magic, version, bool(little_endian)) == (MODEL_MAGIC, MODEL_VERSION, sys.byteorder == 'little') \
+                and (checksum is None or model_checksum == checksum) \
+                and (store_type is None or COUNT_STORES[store_id] is store_type): # e.g. exact counts stored, but sketch requested
+            return COUNT_STORES[store_id].read(data, MODEL_HEADER.size)
+    data.close()
+    return None
 
 class Normalizer:
-    def __init__(self):
+    def __init__(self, sketch_width=0, sketch_depth=4, spelling_cache_path=None, spelling_cache_size=10000, lexicon_path=None, oov_cache_size=100000, spelling_backend="hunspell", spelling_min_count=3, normalize_cache_size=100000, prob_cache_size=100000):
         """
         Normalizer: restores original/formal spelling of misspelled/colloquial token, replaces twitter-specific phenomena for tagging
 
@@ -13,17 +138,52 @@ class Normalizer:
         - then, the normalize() function can be used
 
         For detailed usage, see tests/test_normalizer
+
+        For unbounded training data, sketch_width > 0 replaces the exact counts with a
+        count-min sketch of sketch_width * sketch_depth counters (fixed memory, approximate counts).
+
+        Spelling suggestions are cached for up to spelling_cache_size tokens. With a spelling_cache_path,
+        they are additionally stored on disk and shared between processes and runs.
+
+        Known words are looked up in an in-memory lexicon of the hunspell dictionary (optionally extended by a list of
+        expanded word forms at lexicon_path) before asking hunspell. The last oov_cache_size verdicts are memoized.
+
+        Spelling suggestions are generated by hunspell (spelling_backend="hunspell") or by a symmetric-delete index over the
+        lexicon and all corpus unigrams occurring at least spelling_min_count times (spelling_backend="symspell").
+        The index is built when the first suggestion is requested, i.e. after training. Its suggestions depend on the
+        corpus, so they are only cached in memory, and replacing the counts (load, use_counts) rebuilds the index on the next
+        suggestion. Counts added afterwards (collect_bigrams, update) do not extend the index vocabulary.
+
+        Results of normalize() are memoized for the last normalize_cache_size (token, context, token class) triples and
+        context probabilities for the last prob_cache_size (token, context) pairs. Both memos depend on the counts, so they
+        are cleared whenever the model changes (see model_version).
         """
-        self.dictionary = hunspell.HunSpell("../rsrc/hunspell/de_DE.dic", "../rsrc/hunspell/de_DE.aff")
-        self.bigrams = defaultdict(lambda: 1.0) #add-1
-        self.unigrams = defaultdict(lambda: 1.0)
-        self.emoji_pos = [u"\U0001F601", u"\U0001F602", u"\U0001F603", u"\U0001F604", u"\U0001F605", u"\U0001F606", u"\U0001F607", u"\U0001F608", u"\U0001F609", u"\U0001F60A", u"\U0001F60B", u"\U0001F60C", u"\U0001F60D", u"\U0001F60E", u"\U0001F60F", u"\U0001F638", u"\U0001F639", u"\U0001F63A", u"\U0001F63B"]
-        self.emoji_neg = [u"\U0001F612", u"\U0001F61E", u"\U0001F61F", u"\U0001F620", u"\U0001F621", u"\U0001F622", u"\U0001F623", u"\U0001F625", u"\U0001F627", u"\U0001F628", u"\U0001F62D", u"\U0001F63E", u"\U0001F63F"]
+        self.dictionary = hunspell.HunSpell(DICTIONARY_DIC, DICTIONARY_AFF)
+        self.lexicon = load_lexicon(DICTIONARY_DIC, DICTIONARY_AFF, lexicon_path)
+        self.counts = SketchCountStore(sketch_width, sketch_depth) if sketch_width else CountStore() # add-1 smoothed unigram/bigram counts
+        self.emoji_pos = frozenset([u"\U0001F601", u"\U0001F602", u"\U0001F603", u"\U0001F604", u"\U0001F605", u"\U0001F606", u"\U0001F607", u"\U0001F608", u"\U0001F609", u"\U0001F60A", u"\U0001F60B", u"\U0001F60C", u"\U0001F60D", u"\U0001F60E", u"\U0001F60F", u"\U0001F638", u"\U0001F639", u"\U0001F63A", u"\U0001F63B"])
+        self.emoji_neg = frozenset([u"\U0001F612", u"\U0001F61E", u"\U0001F61F", u"\U0001F620", u"\U0001F621", u"\U0001F622", u"\U0001F623", u"\U0001F625", u"\U0001F627", u"\U0001F628", u"\U0001F62D", u"\U0001F63E", u"\U0001F63F"])
         self.special_tags = ["%HASHTAG%", "%MENTION%", "%SMILEYPOS%", "%SMILEYNEG%", "%SMILEY%", "%URL%", ",", ".", "!", "?", ":", ";", "-", "+++", "–", "\"", "|"]
         self.tokens = 0
-        self._cache_spelling = {}
+        self.spelling_backend = spelling_backend
+        self.spelling_min_count = spelling_min_count
+        self.speller = HunspellBackend(self.dictionary) if spelling_backend == "hunspell" else None # other backends depend on the trained counts
+        if spelling_backend != "hunspell":
+            spelling_cache_path = None
+        dictionary_version = corpus_checksum(DICTIONARY_DIC) + corpus_checksum(DICTIONARY_AFF) if spelling_cache_path else b''
+        self._cache_spelling = SpellingCache(spelling_backend + ":" + dictionary_version.hex(), spelling_cache_path, spelling_cache_size)
+        self._cache_oov = {}
+        self._cache_oov_size = oov_cache_size
+        self._batch_oov = None # unbounded verdicts and suggestions while a batch is normalized (see normalize_many)
+        self._batch_suggestions = None
+        self.model_version = 0 # increased on every change of the counts
+        self._cache_normalize = LRUCache(normalize_cache_size)
+        self._cache_prob = LRUCache(prob_cache_size)
+        self._cache_model_version = 0
+        self.stats = None # optional PipelineStats recording time spent in hunspell, the spelling backend and the context model and counting OOV tokens and corrections
 
-    def get_contexts(self, tweet):
+    @staticmethod
+    def get_contexts(tweet):
         """
         creates all possible bigram combinations for a tweet
         input: list of tokens
@@ -48,25 +208,153 @@ class Normalizer:
         """
         collects unigram and bigram counts for a token
         """
-        self.unigrams[token] += 1
-        self.bigrams[(contexts[0], token)] += 1
-        self.bigrams[(token, contexts[1])] += 1
+        self.counts.add_context(token, contexts)
+        self.model_version += 1
 
 
+    def update(self, tweets, decay=1.0, invalidate=True):
+        """
+        folds new tokenized tweets into the unigram/bigram counts (online learning, O(tokens))
+        input: list of tokenized tweets, factor applied to all previous counts before (1.0 for no decay, O(1), see CountStore.decay),
+        whether the memos of normalize() and getprob() are cleared (see model_version)
+
+        With invalidate=False, memoized results keep reflecting the counts before the update until the next invalidating change.
+        For periodic decay and snapshots without blocking normalization, see OnlineUpdater.
+        New tokens are not added to the vocabulary of the symspell index (see spelling_backend).
+        """
+        if decay != 1.0:
+            self.counts.decay(decay)
+        for tweet in tweets:
+            for token, context in self.get_contexts(tweet):
+                self.counts.add_context(token, context)
+        if invalidate:
+            self.model_version += 1
+
+    def save(self, path, checksum):
+        """
+        stores the unigram/bigram counts in a versioned binary file
+        input: path to the model file, checksum of the training corpus (see corpus_checksum)
+        """
+        save_counts(path, self.counts, checksum)
+
+    def load(self, path, checksum=None):
+        """
+        loads unigram/bigram counts stored by save() via mmap
+        input: path to the model file, checksum of the training corpus (see corpus_checksum, None accepts any corpus)
+        output: True if the model was loaded, False if it is missing, outdated, trained on different data or uses another count store
+        """
+        counts = load_counts(path, checksum, type(self.counts))
+        if counts is None:
+            return False
+        self.use_counts(counts)
+        return True
+
+    def use_counts(self, counts):
+        """
+        replaces the unigram/bigram counts (e.g. loaded by load_counts() or trained concurrently with the dictionary setup)
+        input: count store
+        """
+        self.counts = counts
+        if self.spelling_backend != "hunspell": # the index and the ranking of its suggestions depend on the replaced counts
+            self.speller = None
+            self._cache_spelling.clear()
+        self.model_version += 1
+
+    def _check_model_version(self):
+        """
+        clears the memos of normalize() and getprob() if the counts changed since they were filled
+        """
+        if self._cache_model_version != self.model_version:
+            self._cache_normalize.clear()
+            self._cache_prob.clear()
+            self._cache_model_version = self.model_version
+
     def oov(self, token):
         """
         checks if a token is misspelled (not known to the hunspell dictionary)
         """
+        if token in self.lexicon:
+            return False
+        if self._batch_oov is not None and token in self._batch_oov:
+            return self._batch_oov[token]
+        res = self._cache_oov.get(token)
+        if res is not None:
+            if self._batch_oov is not None:
+                self._batch_oov[token] = res
+            return res
+        if self.stats is not None:
+            start = time.perf_counter()
         try:
-            token = token.encode("latin-1")
+            res = self.dictionary.spell(token.encode("latin-1")) == False
         except UnicodeEncodeError:
-            return True
-        if self.dictionary.spell(token) == False:
-            return True
-        else:
-            return False
+            res = True
+        if self.stats is not None:
+            self.stats.add_time('hunspell', time.perf_counter() - start)
+        if self._cache_oov_size > 0:
+            if len(self._cache_oov) >= self._cache_oov_size:
+                del self._cache_oov[next(iter(self._cache_oov))] # evict the oldest verdict
+            self._cache_oov[token] = res
+        if self._batch_oov is not None:
+            self._batch_oov[token] = res
+        return res
 
-    def normalize(self, token, context):
+    def match_rule(self, token):
+        """
+        replaces twitter phenomena (hashtags, URLs, @Mentions, Smileys, Emojis and punctuation) in a single scan
+        input: token
+        output: replacement of the token or None if no rule applies
+        """
+        if token in self.emoji_pos:
+            return "%SMILEYPOS%"
+        if token in self.emoji_neg:
+            return "%SMILEYNEG%"
+        match = RULES.match(token)
+        if match is None:
+            return None
+        rule = match.lastgroup
+        if rule == 'hashtag':
+            return match.group('hashtag')
+        if rule == 'punctuation':
+            return token[:3]
+        return RULE_PLACEHOLDERS[rule]
+
+    def normalize(self, token, context, token_class=None):
+        """
+        normalizes a token in its context (see _normalize), memoizing the results
+        input: token, tuple of previous and following token, optional token class
+        output: normalized token
+        """
+        normalized, misspelled = self._normalize_memoized(token, context, token_class)
+        self._count_spelling(normalized, misspelled)
+        return normalized
+
+    def _normalize_memoized(self, token, context, token_class=None):
+        """
+        looks up the result of _normalize in the memo or computes it
+        input: token, tuple of previous and following token, optional token class
+        output: tuple of normalized token and token sent to spellcheck (see _normalize)
+        """
+        self._check_model_version()
+        if self.stats is not None:
+            self.stats.count('normalize_calls')
+        key = (token, context, token_class)
+        res = self._cache_normalize.get(key)
+        if res is None:
+            res = self._normalize(token, context, token_class)
+            self._cache_normalize.put(key, res)
+        return res
+
+    def _count_spelling(self, normalized, misspelled):
+        """
+        counts a normalized token as OOV (and as correction if spellcheck changed it), also for memoized results
+        input: normalized token, token sent to spellcheck or None (see _normalize)
+        """
+        if self.stats is not None and misspelled is not None:
+            self.stats.count('oov')
+            if normalized != misspelled:
+                self.stats.count('corrections')
+
+    def _normalize(self, token, context, token_class=None):
         """
         uses Regex rules to correct a token's spelling:
         - replaces twitter phenomena (hashtags, URLs, @Mentions, Smileys and Emojis) with placeholders for POS-Tagging
@@ -78,47 +366,25 @@ class Normalizer:
         - correct capitalization
         - correct unknown words using hunspell's spellcheck suggestions
         all corrections only take place if the resulting trigram (i-1, i, i+1) is more likely in respect to the corpus data
+
+        token_class (optional) is the TOKEN_* class determined by the tokenizer and allows skipping the replacement rules
+
+        output: tuple of normalized token and the token sent to spellcheck (None if it was not out of vocabulary)
         """
         normalized = token
-        # if not self.oov(normalized):
-        #    return normalized
 
-        # Hashtags: sanitize
-        match_hashtag = re.match(r'^#(\S+)', normalized)
-        if match_hashtag:
-            return match_hashtag.group(1)
+        if token_class == TOKEN_HASHTAG:
+            return token[1:], None
+        if token_class == TOKEN_USER:
+            return "%MENTION%", None
+        if not (token_class == TOKEN_WORD and token.isalnum() and token != "xD"): # plain words never match a replacement rule except for the smiley xD
+            replacement = self.match_rule(token)
+            if replacement is not None:
+                return replacement, None
 
-        # @-Mentions: delete content
-        if re.match(r'^@\S+', normalized):
-            return "%MENTION%"
-
-        # Smiley: neg/pos
-        if re.match(r"^[:;x]'?-?[\)D]$", normalized):
-            return "%SMILEYPOS%"
-        if re.match(r"^[:;]'?-?[\(<sSoO]$", normalized):
-            return "%SMILEYNEG%"
-        if re.match(r"^[:;]'?-?[^\)\(DsSoOcC<]$", normalized):
-            return "%SMILEY%"
-
-        # Unicode-Emojis
-        if normalized in self.emoji_pos:
-            return "%SMILEYPOS%"
-        if normalized in self.emoji_neg:
-            return "%SMILEYNEG%"
-        if re.match(r"\\U0001F[0-9A-F]{3}", normalized):
-            return "%SMILEY%"
-
-        # URLs: sub
-        if re.match(r"(https?://)?([a-z]+\.)?[a-z0-9-]+\.[a-z]+(\.[a-z]+)?(/\S*)*", normalized):
-            return "%URL%"
-
-        # punctuation handling
-        match_punct = re.match(r"^[!\?,\.\-\_:;\(\)\[\]\{\}\+\=\~'\"]+$", normalized)
-        if match_punct:
-            if len(normalized) > 3:
-                return normalized[:3]
-            else:
-                return normalized
+        # known words: skip the restoration rules (except for capitalization and colloquial articles which also apply to known words)
+        if not (len(token) > 1 and token == token.upper()) and not RULE_DETERMINER.match(token) and not self.oov(token):
+            return normalized, None
 
         # correct capitalization:
         if len(normalized) > 1 and token == token.upper():
@@ -126,48 +392,84 @@ class Normalizer:
             lowercase = normalized.lower()
             normalized = self.checkprob(lowercase, uppercase, context)
 
-        # successively shorten lenghthened vowels
-        match_vocal = re.findall("[aA]{3,}|[eE]{3,}|[iI]{3,}|[oO]{3,}|[uU]{3,}|[äÄ]{3,}|[üÜ]{3,}|[öÖ]{3,}", normalized)
-        if len(match_vocal) > 0:
-            for match in match_vocal:
-                while self.oov(normalized) and len(match) > 0:
-                    shortened = match[:-1]
-                    normalized = re.sub(match, shortened, normalized)
-                    match = shortened
+        # shorten lengthened vowels: pick the most probable known variant (or the most probable variant if none is known)
+        if VOWEL_RUNS.search(normalized) and self.oov(normalized):
+            candidates = list(vowel_variants(normalized))
+            known = [candidate for candidate in candidates if not self.oov(candidate)]
+            normalized = max(known or candidates, key=lambda candidate: self.getprob(candidate, context))
 
         # correct colloquial articles (nen, ne...)
         # check context: ne Zahl vs toll, ne ?
-        match_det = re.match(r"^('?n(en|e)?)$", normalized)
+        match_det = RULE_DETERMINER.match(normalized)
         if match_det:
             normalized = "ei"+match_det.group(0)
 
         # spellcheck:
         if self.oov(normalized):
-            normalized = self.suggest_spelling(normalized, context)
+            return self.suggest_spelling(normalized, context), normalized
 
-        return normalized
+        return normalized, None
 
 
+    def _initialize_speller(self):
+        """
+        builds the symmetric-delete index over the lexicon and frequent corpus unigrams
+        """
+        words = set(self.lexicon)
+        if hasattr(self.counts, "unigrams"): # approximate counts have no vocabulary
+            words.update(token for token, count in self.counts.unigrams() if count >= self.spelling_min_count and not self.match_rule(token))
+        self.speller = SymmetricDeleteBackend(words, frequency=self.counts.unigram)
+
+    def normalize_many(self, tweets, token_classes=None):
+        """
+        normalizes a batch of tokenized tweets
+        input: list of tokenized tweets, optional list of token classes per tweet (see normalize)
+        output: list of normalized tweets (one normalized token per token)
+
+        every distinct (token, context, token class) triple is normalized only once and the result is scattered back
+        to all of its occurrences. Within the batch, every type is checked against the dictionary and sent to the
+        spelling backend at most once, regardless of the size of the bounded caches. OOV tokens and corrections are
+        still counted per occurrence (see stats).
+        """
+        keys = []
+        for tweet_i, tweet in enumerate(tweets):
+            classes = token_classes[tweet_i] if token_classes is not None else [None] * len(tweet)
+            keys.append([(token, context, token_class) for (token, context), token_class in zip(self.get_contexts(tweet), classes)])
+        results = {}
+        self._batch_oov, self._batch_suggestions = {}, {}
+        try:
+            for tweet_keys in keys:
+                for key in tweet_keys:
+                    res = results.get(key)
+                    if res is None:
+                        res = results[key] = self._normalize_memoized(*key)
+                    self._count_spelling(*res)
+        finally:
+            self._batch_oov, self._batch_suggestions = None, None
+        return [[results[key][0] for key in tweet_keys] for tweet_keys in keys]
+
     def suggest_spelling(self, token, context):
         """
-        uses hunspell dictionary to get correction suggestions for misspelled words
+        uses the spelling backend (hunspell by default) to get correction suggestions for misspelled words
         input: token, and tuple of previous and following token
         output: corrected token if the correction is more likely to occur in corpus
         """
         res = token
-        try:
-            if token in self._cache_spelling:
-                suggestions = self._cache_spelling[token]
-            else: 
-                suggestions = self.dictionary.suggest(token)
-                self._cache_spelling[token] = suggestions
-        except UnicodeEncodeError:
-            return res 
+        suggestions = self._batch_suggestions.get(token) if self._batch_suggestions is not None else None
+        if suggestions is None:
+            suggestions = self._cache_spelling.get(token)
+            if suggestions is None:
+                if self.speller is None:
+                    self._initialize_speller()
+                if self.stats is not None:
+                    start = time.perf_counter()
+                suggestions = self.speller.suggest(token)
+                if self.stats is not None:
+                    self.stats.add_time('spelling', time.perf_counter() - start)
+                self._cache_spelling.put(token, suggestions)
+            if self._batch_suggestions is not None:
+                self._batch_suggestions[token] = suggestions
         for suggestion in suggestions[:3]:
-            try:
-                suggestion = suggestion.decode('latin-1')
-            except UnicodeDecodeError:
-                continue
             # prioritize capitaliation mistakes
             if token.lower() == suggestion.lower():
                 res = suggestion
@@ -176,19 +478,34 @@ class Normalizer:
                 res = self.checkprob(res, suggestion, context)
         return res
 
+    def cache_stats(self):
+        """
+        returns hit/miss counters of the normalizer's caches
+        """
+        return {'spelling': self._cache_spelling.stats(), 'normalize': self._cache_normalize.stats(), 'prob': self._cache_prob.stats()}
+
     def getprob(self, token, context):
         """
         find the probability of sequence token-1 token token+1 given the current corpus of tweets
         input: token, and tuple of previous and following token
         output: probability (float)
         """
-        res = 0.
-        c_bigram_pre = self.bigrams[(context[0], token)]
-        c_bigram_past = self.bigrams[(token, context[1])]
-        c_token = self.unigrams[token]
-        c_pre = self.unigrams[context[0]]
-        c_past = self.unigrams[context[1]]
+        self._check_model_version()
+        key = (token, context)
+        res = self._cache_prob.get(key)
+        if res is not None:
+            return res
+        if self.stats is not None:
+            start = time.perf_counter()
+        c_bigram_pre = self.counts.bigram(context[0], token)
+        c_bigram_past = self.counts.bigram(token, context[1])
+        c_token = self.counts.unigram(token)
+        c_pre = self.counts.unigram(context[0])
+        c_past = self.counts.unigram(context[1])
         res = (c_bigram_pre/(c_token+c_pre))*(c_bigram_past/(c_token+c_past))
+        if self.stats is not None:
+            self.stats.add_time('context_model', time.perf_counter() - start)
+        self._cache_prob.put(key, res)
         return res
 
     def checkprob(self, old, new, context):
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+
+from autosarkasmus.preprocessor.normalizer.normalizer import save_counts
+
+class OnlineUpdater:
+    def __init__(self, normalizer, snapshot_path=None, checksum=bytes(20), decay=1.0, decay_interval=1000, snapshot_interval=600):
+        """
+        OnlineUpdater: adapts the context model of a normalizer to live traffic
+
+        New tweets are folded into the counts of the normalizer as they arrive (see Normalizer.update).
+        Every decay_interval tweets, all counts are multiplied by decay so that old usage fades out.
+        At most every snapshot_interval seconds, a copy of the counts is written to snapshot_path in a
+        background thread (atomically, see save_counts), so normalization is only blocked while copying.
+        Snapshots are stamped with checksum, by default one that matches no corpus, so loaders which check the
+        training corpus (e.g. the default model of a Pipeline) never mistake an adapted model for a trained one.
+
+        The memos of the normalizer (see Normalizer.normalize) are only cleared every decay_interval tweets and
+        at every snapshot, so memoized results may lag behind the live counts until then.
+        """
+        self.normalizer = normalizer
+        self.snapshot_path = snapshot_path
+        self.checksum = checksum
+        self.decay = decay
+        self.decay_interval = decay_interval
+        self.snapshot_interval = snapshot_interval
+        self.tweets = 0
+        self.last_snapshot = time.time()
+        self._lock = threading.Lock()
+        self._snapshot_thread = None
+
+    def update(self, tweets):
+        """
+        folds tokenized tweets into the counts, decays them and takes a snapshot if due
+        input: list of tokenized tweets
+        """
+        tweets = list(tweets)
+        position = 0
+        with self._lock:
+            while position < len(tweets):
+                chunk = tweets[position:position + self.decay_interval - self.tweets % self.decay_interval] # up to the next decay
+                self.normalizer.update(chunk, invalidate=False)
+                self.tweets += len(chunk)
+                position += len(chunk)
+                if self.tweets % self.decay_interval == 0:
+                    self.normalizer.update([], decay=self.decay) # also clears the memos of the normalizer
+        if self.snapshot_path and time.time() - self.last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def snapshot(self):
+        """
+        writes a copy of the current counts to snapshot_path in a background thread
+        output: the writing thread (None if a snapshot is still being written)
+        """
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return None
+        with self._lock:
+            counts = self.normalizer.counts.copy()
+            self.normalizer.update([]) # clears the memos of the normalizer
+        self.last_snapshot = time.time()
+        self._snapshot_thread = threading.Thread(target=self._write_snapshot, args=(counts,), daemon=True)
+        self._snapshot_thread.start()
+        return self._snapshot_thread
+
+    def _write_snapshot(self, counts):
+        """
+        writes counts to the snapshot (atomically, readers never see a partial model)
+        """
+        save_counts(self.snapshot_path, counts, self.checksum)
+
+    def close(self):
+        """
+        waits for a running snapshot to complete
+        """
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
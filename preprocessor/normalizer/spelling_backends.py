@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Spelling Backends (classes)
+
+Correction candidate generators for Normalizer.suggest_spelling. Every backend provides
+suggest(token) which returns a list of candidates (str), best candidates first.
+"""
+
+class HunspellBackend:
+    name = "hunspell"
+
+    def __init__(self, dictionary):
+        """
+        HunspellBackend: suggestions of hunspell's spellchecker
+        input: hunspell.HunSpell dictionary
+        """
+        self.dictionary = dictionary
+
+    def suggest(self, token):
+        """
+        returns hunspell's suggestions for a token (empty list if the token can not be encoded for the dictionary)
+        """
+        try:
+            suggestions = self.dictionary.suggest(token)
+        except UnicodeEncodeError:
+            return []
+        return [suggestion.decode('latin-1') if isinstance(suggestion, bytes) else suggestion for suggestion in suggestions]
+
+
+def edit_distance(source, target, max_distance):
+    """
+    optimal string alignment distance (Damerau-Levenshtein without repeated edits of a substring)
+    output: distance or max_distance + 1 if it exceeds max_distance
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i-1] == target[j-1] else 1
+            current[j] = min(previous[j] + 1, current[j-1] + 1, previous[j-1] + cost)
+            if i > 1 and j > 1 and source[i-1] == target[j-2] and source[i-2] == target[j-1]:
+                current[j] = min(current[j], previous_previous[j-2] + 1)
+        if min(current) > max_distance and min(previous) > max_distance: # transpositions look back two rows
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymmetricDeleteBackend:
+    name = "symspell"
+
+    def __init__(self, words, frequency=None, max_distance=2, prefix_length=7):
+        """
+        SymmetricDeleteBackend: candidates within a maximum edit distance via a precomputed index of deletions
+
+        All deletions of up to max_distance characters of (the first prefix_length characters of) every word
+        are indexed once. A lookup only generates the deletions of the token itself, so suggestions are found
+        without comparing the token to the whole vocabulary. Comparisons are case-insensitive.
+        Candidates are ranked by edit distance, then by frequency (e.g. the corpus unigram counts).
+        input: iterable of words, function returning the frequency of a word
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.frequency = frequency or (lambda word: 0)
+        self.index = {}
+        for word in words:
+            for deletion in self._deletions(word.lower()):
+                entries = self.index.get(deletion)
+                if entries is None:
+                    self.index[deletion] = [word]
+                elif entries[-1] != word:
+                    entries.append(word)
+
+    def _deletions(self, word):
+        """
+        returns the word prefix and all strings created by deleting up to max_distance characters from it
+        """
+        res = {word[:self.prefix_length]}
+        frontier = res
+        for distance in range(self.max_distance):
+            frontier = {candidate[:i] + candidate[i+1:] for candidate in frontier for i in range(len(candidate))}
+            res |= frontier
+        return res
+
+    def suggest(self, token):
+        """
+        returns all indexed words within max_distance of the token, best candidates first
+        """
+        token_low = token.lower()
+        candidates = {}
+        for deletion in self._deletions(token_low):
+            for word in self.index.get(deletion, ()):
+                if word not in candidates and word != token:
+                    candidates[word] = edit_distance(token_low, word.lower(), self.max_distance)
+        ranked = sorted((distance, -self.frequency(word), word) for word, distance in candidates.items() if distance <= self.max_distance)
+        return [word for distance, frequency, word in ranked]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+
+from autosarkasmus.preprocessor.normalizer.lru_cache import LRUCache
+
+class SpellingCache:
+    table = "suggestions" # sqlite table of the on-disk tier
+
+    def __init__(self, version, path=None, max_size=10000):
+        """
+        SpellingCache: LRU-bounded cache of spelling suggestions with an optional on-disk tier
+
+        In-memory entries are limited to max_size tokens (least recently used ones are evicted).
+        If a path is given, suggestions are also stored in an sqlite database which is shared by
+        worker processes and later runs. Entries are keyed by token and dictionary version, so
+        suggestions of an outdated dictionary are never returned.
+        """
+        self.version = version
+        self.path = path
+        self.max_size = max_size
+        self.entries = LRUCache(max_size)
+        self.disk_hits = 0
+        self.misses = 0
+        self._connection = None
+        self._connection_pid = None
+
+    def _db(self):
+        """
+        returns the sqlite connection of the current process (connections must not be shared across forks)
+        """
+        if self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS %s (version TEXT, token TEXT, suggestions BLOB, PRIMARY KEY (version, token))" % self.table)
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, token):
+        """
+        returns the cached suggestions (list of str) for a token or None
+        """
+        suggestions = self.entries.get(token)
+        if suggestions is not None:
+            return suggestions
+        if self.path:
+            row = self._db().execute("SELECT suggestions FROM %s WHERE version=? AND token=?" % self.table, (self.version, token)).fetchone()
+            if row is not None:
+                suggestions = row[0].decode('utf8').split('\n') if row[0] else []
+                self.entries.put(token, suggestions)
+                self.disk_hits += 1
+                return suggestions
+        self.misses += 1
+        return None
+
+    def put(self, token, suggestions):
+        """
+        stores the suggestions (list of str) for a token
+        """
+        self.entries.put(token, suggestions)
+        if self.path:
+            self._db().execute("INSERT OR REPLACE INTO %s VALUES (?, ?, ?)" % self.table, (self.version, token, '\n'.join(suggestions).encode('utf8')))
+
+    def clear(self):
+        """
+        removes all in-memory entries (the on-disk tier is kept)
+        """
+        self.entries.clear()
+
+    def stats(self):
+        """
+        returns hit/miss counters, the hit rate (of both tiers) and the current size of the in-memory tier
+        """
+        lookups = self.entries.hits + self.disk_hits + self.misses
+        hit_rate = (self.entries.hits + self.disk_hits) / lookups if lookups else 0.
+        return {'hits': self.entries.hits, 'disk_hits': self.disk_hits, 'misses': self.misses, 'hit_rate': hit_rate, 'size': len(self.entries)}
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Normalizer Training (functions)
+
+Counts the unigrams/bigrams of the normalizer's context model over many corpus files in parallel (map-reduce).
+"""
+
+import multiprocessing
+
+from autosarkasmus.preprocessor.tokenizer.tokenizer import Tokenizer
+from autosarkasmus.preprocessor.normalizer.normalizer import Normalizer, corpora_checksum, save_counts
+from autosarkasmus.preprocessor.normalizer.count_store import CountStore, SketchCountStore
+
+def count_corpus(path, json_corpus=False, sketch_width=0, sketch_depth=4):
+    """
+    counts the unigrams/bigrams of a single corpus file (map step)
+    input: path to the corpus, whether it is in json format, sketch dimensions (sketch_width=0 for exact counts)
+    output: count store
+    """
+    counts = SketchCountStore(sketch_width, sketch_depth) if sketch_width else CountStore()
+    for tweet_tkn in Tokenizer().tokenize_file(path, json_corpus=json_corpus):
+        for token, context in Normalizer.get_contexts(tweet_tkn):
+            counts.add_context(token, context)
+    return counts
+
+def _count_corpus_worker(args):
+    """
+    unpacks the arguments of count_corpus for Pool.imap
+    """
+    return count_corpus(*args)
+
+def train(paths, workers=1, json_corpus=False, sketch_width=0, sketch_depth=4, output_path=None):
+    """
+    counts the unigrams/bigrams of several corpus files in a pool of worker processes and merges the partial counts (reduce step)
+    input: paths to the corpus files (one shard per file), number of worker processes, whether the corpora are in json format,
+    sketch dimensions (sketch_width=0 for exact counts), optional path for storing the model (see Normalizer.load)
+    output: count store
+    """
+    tasks = [(path, json_corpus, sketch_width, sketch_depth) for path in paths]
+    res = None
+    if workers > 1 and len(paths) > 1:
+        with multiprocessing.Pool(min(workers, len(paths))) as pool:
+            partial_counts = pool.imap(_count_corpus_worker, tasks) # ordered, i.e. the merged model is deterministic
+            for counts in partial_counts:
+                if res is None:
+                    res = counts
+                else:
+                    res.merge(counts)
+    else:
+        for task in tasks:
+            counts = count_corpus(*task)
+            if res is None:
+                res = counts
+            else:
+                res.merge(counts)
+    if output_path:
+        save_counts(output_path, res, corpora_checksum(paths))
+    return res
@@ -6,12 +6,78 @@ A wrapper class for twitter data preprocessing.
 
 import sys
 import os
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from itertools import islice
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from autosarkasmus.corpus.corpus_reader import CorpusReader
 from autosarkasmus.preprocessor.tokenizer.tokenizer import Tokenizer
-from autosarkasmus.preprocessor.normalizer.normalizer import Normalizer
+from autosarkasmus.preprocessor.normalizer.normalizer import Normalizer, corpus_checksum, corpora_checksum, default_model_path, load_counts, save_counts, DICTIONARY_DIC, DICTIONARY_AFF
+from autosarkasmus.preprocessor.normalizer.count_store import CountStore, SketchCountStore
+from autosarkasmus.preprocessor.normalizer.online import OnlineUpdater
 from autosarkasmus.preprocessor.tagger.tagger_m import Tagger
+from autosarkasmus.preprocessor.tagger.tagger_pool import TaggerPool
+from autosarkasmus.preprocessor.tagger.tag_cache import TagCache
+from autosarkasmus.preprocessor.tagger.perceptron_tagger import GOLD_CORPUS
+from autosarkasmus.preprocessor.processed_cache import ProcessedCache
+from autosarkasmus.preprocessor.processed_corpus import ProcessedCorpus, write_processed
+from autosarkasmus.preprocessor.pipeline_stats import PipelineStats
+
+PROCESSED_CACHE_VERSION = 1 # increase whenever the output of the pipeline changes for the same resources
+
+SHARED_RESOURCES = ['training_corpus_paths', 'normalizer_model_path', 'normalizer_model_checked', 'normalizer_sketch_width', 'spelling_cache_path', 'spelling_backend',
+                    'normalizer_decay', 'tagger_mapping_path', 'tagger_backend', 'tagger_model_path', 'tagger_processes', 'tokenizer', 'tag_cache'] # taken from a shared pipeline
+
+_worker_pipeline = None # pipeline of the current worker process (see Pipeline.process)
+
+def _init_worker(pipeline):
+    '''
+    Initialization of a worker process
+
+    The pipeline (including its trained normalizer) is inherited from the parent process via fork.
+    Every worker starts its own TreeTagger instance since the tagger process can not be shared.
+
+    Keyword arguments:
+        pipeline (Pipeline): pipeline with initialized normalizer
+    '''
+    global _worker_pipeline
+    if pipeline.tagger_backend == 'treetagger': # the perceptron tagger runs in-process and is shared like the normalizer
+        pipeline.tagger = Tagger(pipeline.tagger_mapping_path)
+    _worker_pipeline = pipeline
+
+def _process_batch_worker(tweets_raw):
+    '''
+    Processes a batch of tweets in a worker process
+
+    Keyword arguments:
+        tweets_raw (list): raw tweet strings
+
+    Returns:
+        list: of (tokenized tweet, normalized/tagged tweet) tuples
+    '''
+    return _worker_pipeline.process_batch(tweets_raw)
+
+def _batches(iterable, size):
+    '''
+    Splits an iterable into lists of the given size (the last one may be shorter)
+
+    Keyword arguments:
+        iterable (iterable): items to split
+        size (int): number of items per batch
+
+    Returns:
+        generator: of lists
+    '''
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
 
 
 class Pipeline:
@@ -19,9 +85,10 @@ class Pipeline:
     A wrapper class for twitter data preprocessing
 
     Performs tokenization, normalization and pos-tagging of tweet corpora or independent tweets.
+    Resources (tagger, dictionary, normalizer model) are loaded on first use or concurrently by warmup.
     '''
 
-    def __init__(self, corpus_path, tagger_mapping_path, json_corpus=False, verbose=False):
+    def __init__(self, corpus_path, tagger_mapping_path, json_corpus=False, verbose=False, normalizer_model_path=None, normalizer_sketch_width=0, spelling_cache_path=None, spelling_backend='hunspell', normalizer_decay=1.0, tagger_processes=1, tagger_backend='treetagger', tagger_model_path=None, tag_cache_path=None, tag_cache_size=100000, processed_cache_path=None, instrument=False, stats_interval=60, training_corpus_paths=None, shared_pipeline=None):
         '''
         Constructor of Pipeline
 
@@ -29,30 +96,279 @@ class Pipeline:
             corpus_path (str): path to corpus file required for normalizer training and optional processing
             tagger_mapping_path (str): path to mapping file for pos-tagger
             json_corpus (bool): denotes whether corpus is in json format (default=True)
+            normalizer_model_path (str): path to the persisted normalizer model, False disables persistence (default=corpus_path + '.nrm',
+                a name derived from all training corpus paths if training_corpus_paths is given, see default_model_path).
+                A given path is loaded regardless of the corpus it was trained on (e.g. a model trained on many corpus files with
+                "python -m autosarkasmus.preprocessor.normalizer train"), the default one is retrained when the corpus changes.
+                Snapshots of online learning (see learn) are written to a given path, but never to the default one.
+            normalizer_sketch_width (int): width of the count-min sketch for approximate normalizer counts, 0 for exact counts (default=0)
+            spelling_cache_path (str): path to an sqlite database shared by all processes for caching spelling suggestions (default=None)
+            spelling_backend (str): 'hunspell' or 'symspell' (symmetric-delete index, see Normalizer) (default='hunspell')
+            normalizer_decay (float): decay of the normalizer counts per 1000 tweets passed to learn (default=1.0)
+            tagger_processes (int): number of TreeTagger processes, more than 1 starts a TaggerPool (default=1)
+            tagger_backend (str): 'treetagger' or 'perceptron' (in-process tagger trained on the gold corpus, see Tagger) (default='treetagger')
+            tagger_model_path (str): path to the stored perceptron tagger model (default=None)
+            tag_cache_path (str): path to an sqlite database shared by all processes and runs for caching tag sequences (default=None)
+            tag_cache_size (int): number of normalized tweets whose tags are cached in memory (default=100000)
+            processed_cache_path (str): path to an sqlite database caching preprocessed tweets by their raw text, False disables it
+                (default=corpus_path + '.proc.db'). Entries depend on the tokenizer, normalizer model, dictionary and tagger, so they
+                are reused as long as these are unchanged. The cache is not used after online learning (see learn).
+            instrument (bool): records per-stage timings and counters in stats (see PipelineStats) (default=False)
+            stats_interval (float): seconds between summary lines written to stderr by process_iter if instrumented, 0 disables them (default=60)
+            training_corpus_paths (list): paths to the corpus files the normalizer is trained on (default=[corpus_path])
+            shared_pipeline (Pipeline): pipeline whose tokenizer, normalizer (including its dictionary), tagger and tag cache are used
+                instead of creating new ones (default=None). The normalizer is trained once for all sharing pipelines, so they normalize
+                consistently. All other resource arguments are ignored in favour of the shared pipeline's; the corpus, caching of
+                processed tweets and instrumentation remain per pipeline.
         '''
         self.corpus_path = corpus_path
-        self.tokenizer = Tokenizer()
-        self.normalizer = None # normalizer is not initialized until needed
-        self.tagger = Tagger(tagger_mapping_path)
+        self.processed_cache_path = corpus_path + '.proc.db' if processed_cache_path is None else processed_cache_path
+        self.processed_cache = None # created by the first lookup since its version requires the checksums of all resources
         self.json_corpus = json_corpus
         self.verbose = verbose
+        self.stats = PipelineStats() if instrument else None # not aggregated across worker processes (workers > 1)
+        self.stats_interval = stats_interval
+        self.normalizer = None # normalizer is not initialized until needed
+        self.normalizer_updater = None # created by the first call of learn
+        self._tagger = None # tagger is not started until needed
+        self._resources = {} # resource name -> Future (see _resource)
+        self._resources_lock = threading.Lock()
+        self._startup_times = {} # resource name -> seconds spent loading it
+        if shared_pipeline is not None:
+            self.shared_pipeline = shared_pipeline.shared_pipeline or shared_pipeline # the pipeline owning the resources
+            for name in SHARED_RESOURCES:
+                setattr(self, name, getattr(self.shared_pipeline, name))
+            return
+        self.shared_pipeline = None
+        self.training_corpus_paths = [corpus_path] if training_corpus_paths is None else training_corpus_paths
+        self.normalizer_model_path = default_model_path(self.training_corpus_paths) if normalizer_model_path is None else normalizer_model_path
+        self.normalizer_model_checked = normalizer_model_path is None # only the default model is tied to the training corpora
+        self.normalizer_snapshot_path = (self.normalizer_model_path + '.online' if self.normalizer_model_checked else self.normalizer_model_path) or None # adapted models (see learn)
+        self.normalizer_sketch_width = normalizer_sketch_width
+        self.spelling_cache_path = spelling_cache_path
+        self.spelling_backend = spelling_backend
+        self.normalizer_decay = normalizer_decay
+        self.tagger_mapping_path = tagger_mapping_path
+        self.tagger_backend = tagger_backend
+        self.tagger_model_path = tagger_model_path
+        self.tagger_processes = tagger_processes
+        self.tokenizer = Tokenizer()
+        self.tag_cache = TagCache(self._tagger_version() if tag_cache_path else tagger_backend, tag_cache_path, tag_cache_size)
+
+    def _tagger_version(self):
+        '''
+        Version of the tagger (tags depend on the tagger backend, its model and the mapping)
+
+        Returns:
+            str: backend and checksum of its files
+        '''
+        tagger_files = [self.tagger_mapping_path]
+        if self.tagger_backend == 'perceptron':
+            tagger_files.append(self.tagger_model_path or GOLD_CORPUS)
+        return self.tagger_backend + ':' + corpora_checksum(tagger_files).hex()
+
+    def _processed_version(self):
+        '''
+        Version of the whole preprocessing (tokenizer, normalizer model and options, dictionary, tagger)
+
+        The normalizer model is hashed as it was loaded (or stored after training), so the version waits for the model.
+
+        Returns:
+            str: hex digest
+        '''
+        owner = self.shared_pipeline or self
+        owner._resource('normalizer_model', owner._load_normalizer_model).result()
+        if self.normalizer_model_path and os.path.exists(self.normalizer_model_path):
+            normalizer_checksum = corpus_checksum(self.normalizer_model_path) # the model is used regardless of the corpus it was trained on
+        else:
+            normalizer_checksum = corpora_checksum(self.training_corpus_paths) # trained without a model file
+        version = hashlib.sha1()
+        for part in [str(PROCESSED_CACHE_VERSION), self.tokenizer.regex_all, normalizer_checksum.hex(), str(self.normalizer_sketch_width), self.spelling_backend,
+                     corpora_checksum([DICTIONARY_DIC, DICTIONARY_AFF]).hex(), self._tagger_version()]:
+            version.update(part.encode('utf8') + b'\x00')
+        return version.hexdigest()
+
+    @property
+    def tagger(self):
+        '''
+        Tagger or TaggerPool of the pipeline (started on first use, see warmup)
+        '''
+        if self._tagger is None:
+            if self.shared_pipeline is not None:
+                return self.shared_pipeline.tagger
+            self._tagger = self._resource('tagger', self._load_tagger).result()
+        return self._tagger
+
+    @tagger.setter
+    def tagger(self, tagger):
+        self._tagger = tagger
+
+    def warmup(self, wait=False):
+        '''
+        Loads the resources of the pipeline concurrently in background threads
+
+        The tagger (TreeTagger processes and mapping), the dictionary, the normalizer's context model (loaded or trained)
+        and the version of the processed cache are independent of each other. Without warmup, each is loaded on first use.
+        Errors are raised when the resource is used (or here if waiting).
+
+        Keyword arguments:
+            wait (bool): wait until all resources are loaded (default=False)
+
+        Returns:
+            dict: seconds spent loading each resource so far (see startup_times)
+        '''
+        start = time.perf_counter()
+        owner = self.shared_pipeline or self # resources of sharing pipelines are loaded by the shared one
+        futures = [owner._resource('normalizer', owner._load_normalizer), owner._resource('tagger', owner._load_tagger)]
+        if self._use_processed_cache():
+            futures.append(self._resource('processed_cache', self._load_processed_cache))
+        if wait:
+            for future in futures:
+                future.result()
+            self._startup_times['warmup'] = time.perf_counter() - start
+            if self.verbose:
+                print('startup: ' + ', '.join('%s %.2fs' % (name, seconds) for name, seconds in self.startup_times().items()))
+        return self.startup_times()
+
+    def startup_times(self):
+        '''
+        Startup-time breakdown: seconds spent loading every resource which was loaded so far
+
+        Resources are 'tagger', 'dictionary' (hunspell dictionary and lexicon), 'normalizer_model' (counts loaded or trained),
+        'normalizer' (both, loaded concurrently) and 'processed_cache' (checksums of all resources). 'warmup' is the wall time
+        of warmup(wait=True). Resources of a shared pipeline are included.
+
+        Returns:
+            dict: of resource name -> seconds
+        '''
+        res = dict(self.shared_pipeline._startup_times) if self.shared_pipeline is not None else {}
+        res.update(self._startup_times)
+        return res
+
+    def _resource(self, name, load):
+        '''
+        Future of a resource which is loaded in a background thread on its first request
+
+        Keyword arguments:
+            name (str): name of the resource (see startup_times)
+            load (function): creates the resource
+
+        Returns:
+            Future: of the resource
+        '''
+        with self._resources_lock:
+            future = self._resources.get(name)
+            if future is None:
+                future = self._resources[name] = Future()
+                threading.Thread(target=self._load_resource, args=(name, load, future), daemon=True).start()
+        return future
+
+    def _load_resource(self, name, load, future):
+        '''
+        Loads a resource and resolves its future (see _resource)
+        '''
+        start = time.perf_counter()
+        try:
+            resource, error = load(), None
+        except Exception as exception:
+            resource, error = None, exception
+        self._startup_times[name] = time.perf_counter() - start
+        if error is None:
+            future.set_result(resource)
+        else:
+            future.set_exception(error)
+
+    def _wait_resources(self):
+        '''
+        Waits until all resources which are being loaded are ready (e.g. before forking worker processes)
+        '''
+        for pipeline in [self.shared_pipeline, self]:
+            if pipeline is not None:
+                with pipeline._resources_lock:
+                    futures = list(pipeline._resources.values())
+                for future in futures:
+                    future.exception()
+
+    def _load_tagger(self):
+        '''
+        Starts the tagger (a TaggerPool for tagger_processes > 1)
+
+        Returns:
+            Tagger: or TaggerPool
+        '''
+        if self.tagger_backend == 'treetagger' and self.tagger_processes > 1:
+            return TaggerPool(self.tagger_mapping_path, self.tagger_processes)
+        return Tagger(self.tagger_mapping_path, self.tagger_backend, self.tagger_model_path)
+
+    def _load_dictionary(self):
+        '''
+        Creates a normalizer without counts (loads the hunspell dictionary and lexicon)
+
+        Returns:
+            Normalizer
+        '''
+        return Normalizer(sketch_width=self.normalizer_sketch_width, spelling_cache_path=self.spelling_cache_path, spelling_backend=self.spelling_backend)
+
+    def _load_normalizer_model(self):
+        '''
+        Loads the counts of the normalizer's context model or trains them on the training corpora
+
+        The trained counts are stored at normalizer_model_path and reused by later runs as long as the training corpora do not change.
+
+        Returns:
+            CountStore: or SketchCountStore
+        '''
+        store_type = SketchCountStore if self.normalizer_sketch_width else CountStore
+        if self.normalizer_model_path:
+            checksum = corpora_checksum(self.training_corpus_paths)
+            counts = load_counts(self.normalizer_model_path, checksum if self.normalizer_model_checked else None, store_type)
+            if counts is not None:
+                return counts
+        counts = SketchCountStore(self.normalizer_sketch_width) if self.normalizer_sketch_width else CountStore()
+        for tweet in (tweet for path in self.training_corpus_paths for tweet in self._read_corpus(path)):
+            for token, context in Normalizer.get_contexts(self.tokenize(tweet)):
+                counts.add_context(token, context) # train on token_bigrams in corpus
+        if self.normalizer_model_path:
+            save_counts(self.normalizer_model_path, counts, checksum)
+        return counts
+
+    def _load_normalizer(self):
+        '''
+        Sets up the dictionary and the context model concurrently and combines them
+
+        Returns:
+            Normalizer
+        '''
+        dictionary = self._resource('dictionary', self._load_dictionary)
+        model = self._resource('normalizer_model', self._load_normalizer_model)
+        normalizer = dictionary.result()
+        normalizer.use_counts(model.result())
+        normalizer.stats = self.stats
+        return normalizer
+
+    def _load_processed_cache(self):
+        '''
+        Opens the processed cache (its version requires the checksums of all resources)
+
+        Returns:
+            ProcessedCache
+        '''
+        return ProcessedCache(self.processed_cache_path, self._processed_version())
 
     def _initialize_normalizer(self):
         '''
         Initialization of Normalizer
 
-        Since the normalizer requires training data, it is only initialized shortly before it is needed.
-        This is only required once.
+        Since the normalizer requires training data, it is only initialized shortly before it is needed (or by warmup).
+        This is only required once. Pipelines sharing resources use the normalizer of the shared pipeline,
+        which is initialized by the first of them.
         '''
-        normalizer = Normalizer()
-        corpus = CorpusReader(self.corpus_path)
-        corpus_iter = corpus.text_json() if self.json_corpus else corpus.text_txt()
-        for tweet in corpus_iter:
-            tweet_tkn = self.tokenize(tweet)
-            data = normalizer.get_contexts(tweet_tkn)
-            for (token, context) in data:
-                normalizer.collect_bigrams(token, context) # train on token_bigrams in corpus
-        self.normalizer = normalizer
+        if self.shared_pipeline is not None:
+            if self.shared_pipeline.normalizer is None:
+                self.shared_pipeline._initialize_normalizer()
+            self.normalizer = self.shared_pipeline.normalizer
+            return
+        self.normalizer = self._resource('normalizer', self._load_normalizer).result()
 
     def tokenize(self, tweet_raw):
         '''
@@ -66,27 +382,110 @@ class Pipeline:
         '''
         return self.tokenizer.tokenize(tweet_raw)
 
-    def normalize(self, tweet_tkn):
+    def normalize(self, tweet_tkn, token_classes=None):
         '''
         Normalizes a tokenized tweet
 
         Keyword arguments:
             tweet_tkn (list): tokenized tweet
+            token_classes (sequence): token classes of the tokenizer (optional, see Tokenizer.tokenize_spans)
 
         Returns:
             list: of normalized tokens
         '''
-        res = []
         if self.normalizer is None:
             self._initialize_normalizer()
         contexts = self.normalizer.get_contexts(tweet_tkn) # get context
-        for token, context in contexts:
-            normalized = self.normalizer.normalize(token, context) # normalize given token and its context
+        normalized = []
+        for token_i, (token, context) in enumerate(contexts):
+            token_class = token_classes[token_i] if token_classes is not None else None
+            normalized.append(self.normalizer.normalize(token, context, token_class)) # normalize given token and its context
+        return self._mark_hashtags(tweet_tkn, normalized)
+
+    def normalize_many(self, tweets_tkn, tweets_classes=None):
+        '''
+        Normalizes a batch of tokenized tweets
+
+        Every distinct token in context is normalized only once per batch (see Normalizer.normalize_many).
+
+        Keyword arguments:
+            tweets_tkn (list): of tokenized tweets
+            tweets_classes (list): of token classes per tweet (optional, see Tokenizer.tokenize_spans)
+
+        Returns:
+            list: of lists of normalized tokens
+        '''
+        if self.normalizer is None:
+            self._initialize_normalizer()
+        tweets_norm = self.normalizer.normalize_many(tweets_tkn, tweets_classes)
+        return [self._mark_hashtags(tweet_tkn, tweet_norm) for tweet_tkn, tweet_norm in zip(tweets_tkn, tweets_norm)]
+
+    def _mark_hashtags(self, tweet_tkn, tweet_norm):
+        '''
+        Inserts the %HASHTAG% indicator before the content of every hashtag
+
+        Keyword arguments:
+            tweet_tkn (list): tokenized tweet
+            tweet_norm (list): normalized tokens (one per token)
+
+        Returns:
+            list: of normalized tokens
+        '''
+        res = []
+        for token, normalized in zip(tweet_tkn, tweet_norm):
             if token.startswith('#'):
                 res.append('%HASHTAG%') # append %HASHTAG% indicator before hashtag content
             res.append(normalized)
         return res
 
+    def learn(self, tweets_tkn):
+        '''
+        Adapts the normalizer's context model to new tweets (online learning)
+
+        The tweets are folded into the counts immediately. Snapshots of the counts are periodically written in the background
+        to an explicitly given normalizer_model_path, so later runs with that path start with the adapted model. Snapshots of the
+        default model go to normalizer_model_path + '.online' instead, since the default model must only reflect the training corpora.
+
+        Keyword arguments:
+            tweets_tkn (list): tokenized tweets
+        '''
+        if self.shared_pipeline is not None: # the model of all sharing pipelines is adapted
+            self.shared_pipeline.learn(tweets_tkn)
+            return
+        if self.normalizer is None:
+            self._initialize_normalizer()
+        if self.normalizer_updater is None:
+            self.normalizer_updater = OnlineUpdater(self.normalizer, self.normalizer_snapshot_path, decay=self.normalizer_decay) # snapshots are not stamped with the corpus checksum
+        self.normalizer_updater.update(tweets_tkn)
+
+    def close(self):
+        '''
+        Releases the resources owned by the pipeline
+
+        Stops the TreeTagger processes of a TaggerPool (once the queued requests are tagged) and waits for a snapshot of
+        online learning being written (see learn). Resources of a shared pipeline are left to it.
+        '''
+        if self.shared_pipeline is not None:
+            return
+        if self.normalizer_updater is not None:
+            self.normalizer_updater.close()
+        tagger = self._tagger
+        with self._resources_lock:
+            future = self._resources.get('tagger')
+        if tagger is None and future is not None and future.exception() is None: # started by warmup, but not used yet
+            tagger = future.result()
+        if isinstance(tagger, TaggerPool):
+            tagger.close()
+
+    def _use_processed_cache(self):
+        '''
+        Whether the processed cache is enabled (cached results do not reflect a model adapted by learn)
+
+        Returns:
+            bool
+        '''
+        return bool(self.processed_cache_path) and (self.shared_pipeline or self).normalizer_updater is None
+
     def tag(self, tweet_norm):
         '''
         POS-tag a normalized tweet
@@ -97,7 +496,96 @@ class Pipeline:
         Returns:
             list: of tagged and normalized tokens (e.g. [('Deutsche', 'ADJ'), ('Bahn', 'NOUN')])
         '''
-        return self.tagger.tag(tweet_norm)
+        return self.tag_many([tweet_norm])[0]
+
+    def tag_many(self, tweets_norm):
+        '''
+        POS-tag a batch of normalized tweets with a single tagger call (see Tagger.tag_many)
+
+        Tweets found in the tag cache and repeated tweets of the batch are not sent to the tagger.
+
+        Keyword arguments:
+            tweets_norm (list): of normalized tweets
+
+        Returns:
+            list: of lists of tagged and normalized tokens
+        '''
+        tweets_tag, misses = self._lookup_tags(tweets_norm)
+        if not misses:
+            return self._store_tags(tweets_norm, tweets_tag, misses, [])
+        if self.stats is not None:
+            start = time.perf_counter()
+        misses_tag = self.tagger.tag_many(misses)
+        if self.stats is not None:
+            self.stats.add_time('tag', time.perf_counter() - start)
+            self.stats.count('tagged_tweets', len(misses))
+        return self._store_tags(tweets_norm, tweets_tag, misses, misses_tag)
+
+    def _lookup_tags(self, tweets_norm):
+        '''
+        Looks up normalized tweets in the tag cache
+
+        Keyword arguments:
+            tweets_norm (list): of normalized tweets
+
+        Returns:
+            tuple: list of cached tagged tweets (None if not cached), list of distinct tweets which have to be tagged
+        '''
+        tweets_tag = [self.tag_cache.get_tags(tweet_norm) for tweet_norm in tweets_norm]
+        misses = {}
+        for tweet_norm, tweet_tag in zip(tweets_norm, tweets_tag):
+            if tweet_tag is None:
+                misses.setdefault(tuple(tweet_norm), tweet_norm)
+        return tweets_tag, list(misses.values())
+
+    def _store_tags(self, tweets_norm, tweets_tag, misses, misses_tag):
+        '''
+        Caches the tags of previously missing tweets and completes the tagged batch
+
+        Keyword arguments:
+            tweets_norm (list): of normalized tweets
+            tweets_tag (list): of cached tagged tweets (None if not cached, see _lookup_tags)
+            misses (list): of distinct tweets which were tagged
+            misses_tag (list): of tagged tweets (one per miss)
+
+        Returns:
+            list: of lists of tagged and normalized tokens
+        '''
+        tagged = {}
+        for tweet_norm, tweet_tag in zip(misses, misses_tag):
+            self.tag_cache.put_tags(tweet_norm, tweet_tag)
+            tagged[tuple(tweet_norm)] = tweet_tag
+        return [tweet_tag if tweet_tag is not None else tagged[tuple(tweet_norm)] for tweet_norm, tweet_tag in zip(tweets_norm, tweets_tag)]
+
+    def instrumentation(self):
+        '''
+        Per-stage timings, counters and cache hit rates of an instrumented pipeline (see PipelineStats.summary)
+
+        Timings and counters of worker processes (process with workers > 1) are not included.
+
+        Returns:
+            dict: summary with additional 'caches' and 'startup' entries (see cache_stats and startup_times), None if the pipeline is not instrumented
+        '''
+        if self.stats is None:
+            return None
+        res = self.stats.summary()
+        res['caches'] = self.cache_stats()
+        res['startup'] = self.startup_times()
+        return res
+
+    def cache_stats(self):
+        '''
+        Hit and miss counters of the caches of the pipeline
+
+        Returns:
+            dict: of cache name -> counters (including the hit rate)
+        '''
+        res = {'tags': self.tag_cache.stats()}
+        if self.processed_cache is not None:
+            res['processed'] = self.processed_cache.stats()
+        if self.normalizer is not None:
+            res.update(self.normalizer.cache_stats())
+        return res
 
     def process_tweet(self, tweet_raw):
         '''
@@ -109,32 +597,246 @@ class Pipeline:
         Returns:
             tuple: tokenized tweet, normalized/tagged tweet
         '''
-        tweet_tkn = self.tokenize(tweet_raw)
-        tweet_norm = self.normalize(tweet_tkn)
-        tweet_tag = self.tag(tweet_norm)
-        return tweet_tkn, tweet_tag
+        return self.process_batch([tweet_raw])[0]
+
+    def process_batch(self, tweets_raw):
+        '''
+        Process a batch of tweets
+
+        Normalization and tagging are performed for the whole batch at once (see normalize_many and tag_many).
+        Tweets found in the processed cache are not preprocessed again.
+
+        Keyword arguments:
+            tweets_raw (list): raw tweet strings
+
+        Returns:
+            list: of (tokenized tweet, normalized/tagged tweet) tuples
+        '''
+        results, misses = self._lookup_processed(tweets_raw)
+        if misses:
+            tweets_tkn, tweets_norm = self._normalize_batch(misses)
+            return self._store_processed(results, misses, list(zip(tweets_tkn, self.tag_many(tweets_norm))))
+        return results
+
+    def _lookup_processed(self, tweets_raw):
+        '''
+        Looks up raw tweets in the processed cache
 
-    def process(self):
+        Keyword arguments:
+            tweets_raw (list): raw tweet strings
+
+        Returns:
+            tuple: list of cached results (None if not cached), list of raw tweets which have to be processed
+        '''
+        if self.stats is not None:
+            self.stats.count('tweets', len(tweets_raw))
+        if not self._use_processed_cache():
+            return [None] * len(tweets_raw), tweets_raw
+        if self.processed_cache is None:
+            self.processed_cache = self._resource('processed_cache', self._load_processed_cache).result()
+        if self.stats is not None:
+            start = time.perf_counter()
+        results = self.processed_cache.get_many(tweets_raw)
+        if self.stats is not None:
+            self.stats.add_time('processed_cache', time.perf_counter() - start)
+        return results, [tweet_raw for tweet_raw, result in zip(tweets_raw, results) if result is None]
+
+    def _store_processed(self, results, misses, misses_processed):
+        '''
+        Caches the results of previously missing tweets and completes the processed batch
+
+        Keyword arguments:
+            results (list): of cached results (None if not cached, see _lookup_processed)
+            misses (list): of raw tweets which were processed
+            misses_processed (list): of (tokenized tweet, normalized/tagged tweet) tuples (one per miss)
+
+        Returns:
+            list: of (tokenized tweet, normalized/tagged tweet) tuples
+        '''
+        if self._use_processed_cache():
+            self.processed_cache.put_many(misses, misses_processed)
+        return self._merge_processed(results, misses_processed)
+
+    def _merge_processed(self, results, misses_processed):
         '''
-        Process the entire given corpus
+        Fills the results of tweets which were not cached
+
+        Keyword arguments:
+            results (list): of cached results (None if not cached, see _lookup_processed)
+            misses_processed (list): of (tokenized tweet, normalized/tagged tweet) tuples (one per None in results)
+
+        Returns:
+            list: of (tokenized tweet, normalized/tagged tweet) tuples
+        '''
+        misses_processed = iter(misses_processed)
+        return [result if result is not None else next(misses_processed) for result in results]
+
+    def _normalize_batch(self, tweets_raw):
+        '''
+        Tokenizes and normalizes a batch of tweets
+
+        Keyword arguments:
+            tweets_raw (list): raw tweet strings
+
+        Returns:
+            tuple: list of tokenized tweets, list of normalized tweets
+        '''
+        if not tweets_raw:
+            return [], []
+        if self.stats is not None:
+            start = time.perf_counter()
+        tweets_tkn = []
+        tweets_classes = []
+        for tweet_raw, tweet_spans in self.tokenizer.tokenize_many(tweets_raw, spans=True):
+            tweets_tkn.append(self.tokenizer.tokens_from_spans(tweet_raw, tweet_spans))
+            tweets_classes.append(tweet_spans[2::3]) # reuse the token classes of the tokenizer
+        if self.stats is None:
+            return tweets_tkn, self.normalize_many(tweets_tkn, tweets_classes)
+        tokenized = time.perf_counter()
+        self.stats.add_time('tokenize', tokenized - start)
+        self.stats.count('tokens', sum(len(tweet_tkn) for tweet_tkn in tweets_tkn))
+        tweets_norm = self.normalize_many(tweets_tkn, tweets_classes)
+        self.stats.add_time('normalize', time.perf_counter() - tokenized) # includes the training/loading of the normalizer on first use
+        return tweets_tkn, tweets_norm
+
+    def process(self, workers=1, chunksize=64):
+        '''
+        Process the entire given corpus (see process_iter to stream the results instead of collecting them)
+
+        With workers > 1 the corpus is sharded across a pool of processes. The normalizer is trained once
+        and shared with the workers via fork (copy-on-write) while every worker runs its own tagger.
+        Otherwise, with a TaggerPool (tagger_processes > 1), batches are tagged by the pool while the following ones are normalized.
+        The order of the results is the order of the corpus.
+
+        Keyword arguments:
+            workers (int): number of worker processes (default=1)
+            chunksize (int): number of tweets normalized and tagged as one batch and sent to a worker at once (default=64)
 
         Returns:
             tuple: list of tokenized tweets, list of their normalized and tagged counterparts
         '''
         res_tkn = []
         res_proc = []
-        corpus = CorpusReader(self.corpus_path)
-        corpus_iter = corpus.text_json() if self.json_corpus else corpus.text_txt() # check for corpus type
-        for tweet_i, tweet_raw in enumerate(corpus_iter):
+        for tweet_tkn, tweet_proc in self.process_iter(workers, chunksize):
             if self.verbose:
-                sys.stdout.write('\rtweet: %d of %d' % (tweet_i+1, len(corpus_iter)))
+                sys.stdout.write('\rtweet: %d' % (len(res_tkn)+1))
                 sys.stdout.flush()
-            tweet_tkn, tweet_proc = self.process_tweet(tweet_raw)
             res_tkn.append(tweet_tkn)
             res_proc.append(tweet_proc)
-        if self.verbose: sys.stdout.write('\rpreprocessing complete (%d tweets)'%(len(corpus_iter)) + (' ' * len(str(len(corpus_iter))) + '\n'))
+        if self.verbose: sys.stdout.write('\rpreprocessing complete (%d tweets)'%(len(res_tkn)) + (' ' * len(str(len(res_tkn))) + '\n'))
         return res_tkn, res_proc
 
+    def process_iter(self, workers=1, chunksize=64):
+        '''
+        Process the entire given corpus lazily
+
+        The corpus is streamed from disk and only a few batches are held in memory at a time
+        (see process for the meaning of the arguments).
+
+        Keyword arguments:
+            workers (int): number of worker processes (default=1)
+            chunksize (int): number of tweets normalized and tagged as one batch and sent to a worker at once (default=64)
+
+        Returns:
+            generator: of (tokenized tweet, normalized/tagged tweet) tuples in corpus order
+        '''
+        corpus_iter = self._read_corpus()
+        if workers > 1:
+            results = self._process_parallel(corpus_iter, workers, chunksize)
+        elif self.tagger_backend == 'treetagger' and self.tagger_processes > 1: # tagged by a TaggerPool
+            results = self._process_pooled(corpus_iter, chunksize)
+        else:
+            results = (result for batch in _batches(corpus_iter, chunksize) for result in self.process_batch(batch))
+        if self.stats is None:
+            yield from results
+            return
+        logged = time.perf_counter()
+        for result in results:
+            if self.stats_interval and time.perf_counter() - logged >= self.stats_interval:
+                sys.stderr.write(self.stats.log_line(self.cache_stats()) + '\n')
+                logged = time.perf_counter()
+            yield result
+
+    def _read_corpus(self, path=None):
+        '''
+        Streams the raw tweets of the corpus
+
+        Keyword arguments:
+            path (str): path to another corpus file in the same format (default=corpus_path)
+
+        Returns:
+            generator: of raw tweet strings
+        '''
+        corpus = CorpusReader(self.corpus_path if path is None else path)
+        return corpus.iter_text_json() if self.json_corpus else corpus.iter_text_txt() # check for corpus type
+
+    def _process_pooled(self, tweets_raw, chunksize):
+        '''
+        Process tweets while the tagger pool tags previous batches
+
+        Keyword arguments:
+            tweets_raw (iterable): raw tweet strings
+            chunksize (int): number of tweets per batch
+
+        Returns:
+            generator: of (tokenized tweet, normalized/tagged tweet) tuples in input order
+        '''
+        pending = deque() # batches being tagged (see _lookup_processed and _lookup_tags) with the future of the tagged misses
+        for batch in _batches(tweets_raw, chunksize):
+            results, batch_misses = self._lookup_processed(batch)
+            tweets_tkn, tweets_norm = self._normalize_batch(batch_misses)
+            tweets_tag, misses = self._lookup_tags(tweets_norm)
+            pending.append((results, batch_misses, tweets_tkn, tweets_norm, tweets_tag, misses, self.tagger.tag_many_async(misses)))
+            if len(pending) > self.tagger.size: # keep every tagger process busy
+                yield from self._resolve_pooled(*pending.popleft())
+        while pending:
+            yield from self._resolve_pooled(*pending.popleft())
+
+    def _resolve_pooled(self, results, batch_misses, tweets_tkn, tweets_norm, tweets_tag, misses, misses_tag):
+        '''
+        Waits for the tagger pool to tag a batch (see _process_pooled)
+
+        Returns:
+            list: of (tokenized tweet, normalized/tagged tweet) tuples
+        '''
+        tweets_tag = self._store_tags(tweets_norm, tweets_tag, misses, misses_tag.result())
+        return self._store_processed(results, batch_misses, list(zip(tweets_tkn, tweets_tag)))
+
+    def _process_parallel(self, tweets_raw, workers, chunksize):
+        '''
+        Process tweets in a pool of worker processes
+
+        Keyword arguments:
+            tweets_raw (iterable): raw tweet strings
+            workers (int): number of worker processes
+            chunksize (int): number of tweets per batch sent to a worker
+
+        Returns:
+            generator: of (tokenized tweet, normalized/tagged tweet) tuples in input order
+        '''
+        pool = None # started for the first tweet which is not in the processed cache
+        pending = deque() # cached results of the batches with the results of their misses sent to the workers
+        try:
+            for batch in _batches(tweets_raw, chunksize):
+                results, misses = self._lookup_processed(batch)
+                if misses and pool is None:
+                    if self.normalizer is None:
+                        self._initialize_normalizer() # train before forking so that all workers share the counts
+                    if self.tagger_backend != 'treetagger':
+                        self.tagger = self.tagger # start the in-process tagger before forking so that all workers share it
+                    self._wait_resources() # no background thread may hold a lock while forking
+                    pool = multiprocessing.get_context('fork').Pool(workers, initializer=_init_worker, initargs=(self,))
+                pending.append((results, pool.apply_async(_process_batch_worker, (misses,)) if misses else None))
+                if len(pending) >= 2 * workers: # only read ahead as far as the workers can process
+                    results, misses_processed = pending.popleft()
+                    yield from self._merge_processed(results, misses_processed.get() if misses_processed else [])
+            while pending:
+                results, misses_processed = pending.popleft()
+                yield from self._merge_processed(results, misses_processed.get() if misses_processed else [])
+        finally:
+            if pool is not None:
+                pool.terminate()
+
     def write_file(self, tweets_proc, path):
         '''
         Writes tweets to file
@@ -172,9 +874,9 @@ class Pipeline:
             for line in fop:
                 if line.startswith('#'): # ignore comments
                     continue
-                line_parts = [part.trim() for part in line.split('\t')]
+                line_parts = [part.strip() for part in line.split('\t')]
                 if len(line_parts) == 1: # line contains only token
-                    if line_parts[0] == '\n':
+                    if line_parts[0] == '':
                         res.append(cur_tweet)
                         cur_tweet = []
                     else:
@@ -182,3 +884,29 @@ class Pipeline:
                 elif len(line_parts) == 2: # line also contains tags
                     cur_tweet.append((line_parts[0], line_parts[1]))
         return res
+
+    def write_binary(self, tweets_proc, path):
+        '''
+        Writes tweets to a compact binary file (see ProcessedCorpus)
+
+        Supports tokenized, normalized and tagged tweets. Much faster to load than write_file.
+
+        Keyword arguments:
+            tweets_proc (iterable): contains processed tweets
+            path (str): path to output file
+        '''
+        write_processed(path, tweets_proc)
+
+    def load_binary(self, path):
+        '''
+        Loads processed tweets from a binary file written by write_binary
+
+        The file is memory-mapped and tweets are decoded on access.
+
+        Keyword arguments:
+            path (str): to input file
+
+        Returns:
+            ProcessedCorpus: sequence of tokenized, normalized and/or tagged tweets (random access by index)
+        '''
+        return ProcessedCorpus(path)
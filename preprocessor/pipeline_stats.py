@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+'''PipelineStats (class)
+
+Per-stage timings and counters of the preprocessing pipeline.
+'''
+
+import time
+
+class PipelineStats:
+    '''
+    Accumulates the time spent per stage (e.g. tokenize, normalize, tag) and named counters
+
+    Stages may be nested (e.g. hunspell is part of normalize), so their times do not add up to the total.
+    Instances are only created for instrumented pipelines; uninstrumented code checks for None and skips all timing.
+    '''
+
+    def __init__(self):
+        '''
+        Constructor of PipelineStats
+        '''
+        self.started = time.perf_counter()
+        self.times = {} # stage -> seconds
+        self.calls = {} # stage -> number of timed calls
+        self.counters = {} # name -> count
+
+    def add_time(self, stage, seconds, calls=1):
+        '''
+        Adds the duration of a stage
+
+        Keyword arguments:
+            stage (str): name of the stage
+            seconds (float): duration
+            calls (int): number of calls the duration covers (default=1)
+        '''
+        self.times[stage] = self.times.get(stage, 0.) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    def count(self, name, n=1):
+        '''
+        Increases a counter
+
+        Keyword arguments:
+            name (str): name of the counter
+            n (int): increment (default=1)
+        '''
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        '''
+        Snapshot of all timings and counters
+
+        Returns:
+            dict: elapsed seconds, stage -> {'seconds', 'calls'}, counters and tweets per second
+        '''
+        elapsed = time.perf_counter() - self.started
+        return {
+            'elapsed': elapsed,
+            'stages': {stage: {'seconds': seconds, 'calls': self.calls[stage]} for stage, seconds in self.times.items()},
+            'counters': dict(self.counters),
+            'tweets_per_second': self.counters.get('tweets', 0) / elapsed if elapsed > 0 else 0.
+        }
+
+    def log_line(self, cache_stats=None):
+        '''
+        One-line summary for periodic logging
+
+        Keyword arguments:
+            cache_stats (dict): of cache name -> counters including the hit rate (optional, see Pipeline.cache_stats)
+
+        Returns:
+            str: e.g. "12.0s 3000 tweets (250.0/s) | tokenize 0.31s normalize 6.12s tag 4.20s | oov 512 | cache hit rates: tags 41%"
+        '''
+        summary = self.summary()
+        parts = ['%.1fs %d tweets (%.1f/s)' % (summary['elapsed'], summary['counters'].get('tweets', 0), summary['tweets_per_second'])]
+        if self.times:
+            parts.append(' '.join('%s %.2fs' % (stage, seconds) for stage, seconds in self.times.items()))
+        counters = [(name, n) for name, n in self.counters.items() if name != 'tweets']
+        if counters:
+            parts.append(' '.join('%s %d' % (name, n) for name, n in counters))
+        if cache_stats:
+            parts.append('cache hit rates: ' + ' '.join('%s %.0f%%' % (name, 100 * stats['hit_rate']) for name, stats in cache_stats.items()))
+        return ' | '.join(parts)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+'''ProcessedCache (class)
+
+Content-addressed on-disk cache of preprocessed tweets.
+'''
+
+import os
+import json
+import hashlib
+import sqlite3
+
+class ProcessedCache:
+    '''
+    Cache of tokenized and normalized/tagged tweets keyed by a hash of the raw tweet
+
+    Entries are stored in an sqlite database together with a version which should identify everything the
+    preprocessing depends on (tokenizer, normalizer model, dictionary, tagger), so results of an outdated
+    pipeline are never returned. The database can be shared by processes and later runs.
+    '''
+
+    def __init__(self, path, version):
+        '''
+        Constructor of ProcessedCache
+
+        Keyword arguments:
+            path (str): path to the sqlite database
+            version (str): version of the preprocessing
+        '''
+        self.path = path
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._connection_pid = None
+
+    def _db(self):
+        '''
+        Returns the sqlite connection of the current process (connections must not be shared across forks)
+        '''
+        if self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS processed (version TEXT, key TEXT, tweet BLOB, PRIMARY KEY (version, key))')
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def key(tweet_raw):
+        '''
+        Content hash of a raw tweet
+
+        Keyword arguments:
+            tweet_raw (str): raw tweet string
+
+        Returns:
+            str: hex digest
+        '''
+        return hashlib.blake2b(tweet_raw.encode('utf8', 'surrogatepass'), digest_size=16).hexdigest()
+
+    def get_many(self, tweets_raw):
+        '''
+        Looks up a batch of raw tweets
+
+        Keyword arguments:
+            tweets_raw (list): raw tweet strings
+
+        Returns:
+            list: of (tokenized tweet, normalized/tagged tweet) tuples (None if not cached)
+        '''
+        keys = [self.key(tweet_raw) for tweet_raw in tweets_raw]
+        found = {}
+        distinct = list(set(keys))
+        for start in range(0, len(distinct), 500): # stay below the maximum number of sqlite parameters
+            chunk = distinct[start:start+500]
+            query = 'SELECT key, tweet FROM processed WHERE version=? AND key IN (%s)' % ','.join('?' * len(chunk))
+            for key, tweet in self._db().execute(query, [self.version] + chunk):
+                tweet_tkn, tweet_proc = json.loads(tweet.decode('utf8'))
+                found[key] = (tweet_tkn, [tuple(token) for token in tweet_proc])
+        res = [found.get(key) for key in keys]
+        self.hits += len(res) - res.count(None)
+        self.misses += res.count(None)
+        return res
+
+    def put_many(self, tweets_raw, results):
+        '''
+        Stores a batch of preprocessed tweets
+
+        Keyword arguments:
+            tweets_raw (list): raw tweet strings
+            results (list): of (tokenized tweet, normalized/tagged tweet) tuples
+        '''
+        rows = [(self.version, self.key(tweet_raw), json.dumps(result, ensure_ascii=False).encode('utf8')) for tweet_raw, result in zip(tweets_raw, results)]
+        db = self._db()
+        db.execute('BEGIN')
+        try:
+            db.executemany('INSERT OR REPLACE INTO processed VALUES (?, ?, ?)', rows)
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def stats(self):
+        '''
+        Hit and miss counters
+
+        Returns:
+            dict: of counters and the hit rate
+        '''
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.}
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+'''ProcessedCorpus (class)
+
+Compact binary format for tokenized, normalized and/or tagged tweets.
+'''
+
+import sys
+import mmap
+import struct
+from array import array
+
+CORPUS_MAGIC = b'ASPC'
+CORPUS_VERSION = 1 # increase whenever the layout changes
+CORPUS_HEADER = struct.Struct('<4sIBBIIIQ') # magic, version, byte order, tagged, vocabulary size, tags, tweets, tokens
+
+def _write_table(fop, strings):
+    '''
+    Writes a string table (uint32 end offsets followed by the utf-8 blob, padded to 8 bytes)
+
+    Keyword arguments:
+        fop (file): binary file object
+        strings (list): of str
+    '''
+    offsets = array('I')
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf8', 'surrogatepass')
+        offsets.append(len(blob))
+    blob += bytes(-(len(offsets) * offsets.itemsize + len(blob)) % 8)
+    fop.write(offsets)
+    fop.write(blob)
+
+def write_processed(path, tweets):
+    '''
+    Writes processed tweets in the binary corpus format
+
+    Layout: header, vocabulary table, tag table (see _write_table), tweet offsets (int64, one more than tweets),
+    token ids (int32), tag ids (int32, only for tagged tweets). Arrays are stored in native byte order.
+
+    Keyword arguments:
+        path (str): path to the output file
+        tweets (iterable): of tokenized/normalized tweets (lists of str) or tagged tweets (lists of (token, tag) tuples)
+    '''
+    vocab = {}
+    tags = {}
+    offsets = array('q', [0])
+    token_ids = array('i')
+    tag_ids = array('i')
+    tagged = None
+    for tweet in tweets:
+        for token in tweet:
+            if tagged is None:
+                tagged = type(token) is tuple
+            if tagged:
+                token, tag = token
+                tag_ids.append(tags.setdefault(tag, len(tags)))
+            token_ids.append(vocab.setdefault(token, len(vocab)))
+        offsets.append(len(token_ids))
+    with open(path, 'wb') as fop:
+        fop.write(CORPUS_HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, sys.byteorder == 'little', bool(tagged), len(vocab), len(tags), len(offsets) - 1, len(token_ids)))
+        _write_table(fop, vocab) # dicts preserve insertion order, i.e. the ids
+        _write_table(fop, tags)
+        for data in [offsets, token_ids, tag_ids]:
+            fop.write(data)
+
+
+class ProcessedCorpus:
+    '''
+    Read-only view of a corpus written by write_processed
+
+    The file is memory-mapped, so opening is independent of the corpus size; tweets are decoded on access
+    (by index, slice or iteration). Every string of the vocabulary and tag tables is decoded at most once.
+    '''
+
+    def __init__(self, path):
+        '''
+        Constructor of ProcessedCorpus
+
+        Keyword arguments:
+            path (str): path to a file written by write_processed
+        '''
+        with open(path, 'rb') as fop:
+            self._data = mmap.mmap(fop.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < CORPUS_HEADER.size:
+            raise ValueError('not a processed corpus: ' + path)
+        magic, version, little_endian, tagged, n_vocab, n_tags, n_tweets, n_tokens = CORPUS_HEADER.unpack_from(self._data)
+        if (magic, version, bool(little_endian)) != (CORPUS_MAGIC, CORPUS_VERSION, sys.byteorder == 'little'):
+            raise ValueError('unsupported processed corpus (magic, version or byte order): ' + path)
+        self.tagged = bool(tagged)
+        view = self._view = memoryview(self._data)
+        position = CORPUS_HEADER.size
+        self._vocab, position = self._read_table(view, position, n_vocab)
+        self._tags, position = self._read_table(view, position, n_tags)
+        self._offsets = view[position:position + 8 * (n_tweets + 1)].cast('q')
+        position += 8 * (n_tweets + 1)
+        self._token_ids = view[position:position + 4 * n_tokens].cast('i')
+        position += 4 * n_tokens
+        self._tag_ids = view[position:position + 4 * n_tokens].cast('i') if self.tagged else None
+
+    @staticmethod
+    def _read_table(view, position, size):
+        '''
+        Maps a string table written by _write_table
+
+        Returns:
+            tuple: [end offsets, blob, decoded strings (None until accessed)], position after the table
+        '''
+        offsets = view[position:position + 4 * size].cast('I')
+        position += 4 * size
+        blob_size = offsets[-1] if size else 0
+        blob = view[position:position + blob_size]
+        position += blob_size + (-(4 * size + blob_size) % 8)
+        return [offsets, blob, [None] * size], position
+
+    @staticmethod
+    def _strings(table, string_ids):
+        '''
+        Returns (and memoizes) the strings of a table with the given ids
+        '''
+        offsets, blob, strings = table
+        string_ids = string_ids.tolist()
+        res = [strings[string_id] for string_id in string_ids]
+        if None in res: # decode strings which were not accessed before
+            for i, string_id in enumerate(string_ids):
+                if res[i] is None:
+                    start = offsets[string_id - 1] if string_id else 0
+                    res[i] = strings[string_id] = str(blob[start:offsets[string_id]], 'utf8', 'surrogatepass')
+        return res
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        '''
+        Returns a tweet (list of tokens or of (token, tag) tuples) or a list of tweets for a slice
+        '''
+        if isinstance(index, slice):
+            return [self[tweet_i] for tweet_i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('tweet index out of range')
+        start, end = self._offsets[index], self._offsets[index + 1]
+        tokens = self._strings(self._vocab, self._token_ids[start:end])
+        if not self.tagged:
+            return tokens
+        return list(zip(tokens, self._strings(self._tags, self._tag_ids[start:end])))
+
+    def __iter__(self):
+        for tweet_i in range(len(self)):
+            yield self[tweet_i]
+
+    def close(self):
+        '''
+        Releases the memory map (tweets can no longer be accessed)
+        '''
+        for table in [self._vocab, self._tags]:
+            table[0].release()
+            table[1].release()
+        for view in [self._offsets, self._token_ids, self._tag_ids]:
+            if view is not None:
+                view.release()
+        self._view.release()
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,87 @@
+'''
+Evaluates the in-process perceptron tagger on the gold corpus and compares its throughput with TreeTagger.
+
+The perceptron is trained and tested by 10-fold cross-validation on the STTS annotations (gold_corpus.tags).
+Its tags are mapped to the universal tagset and evaluated with tagger_accuracy.py. Given a mapping file, the tags are
+mapped like in the pipeline (Tagger.apply_map, e.g. with de-tiger.map as for comparison_univ.txt). Otherwise, the mapping
+of every fold is read off the aligned gold_corpus_universal.tags of its training tweets only.
+
+Usage: accuracy_perceptron.py [mapping_file]
+Input: gold_corpus.tags, gold_corpus_universal.tags
+Output: perceptron_output.tagged, accuracy_neg_perceptron.tags
+'''
+
+import sys
+import os.path
+import time
+from collections import Counter, defaultdict
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+from autosarkasmus.preprocessor.tagger.perceptron_tagger import PerceptronTagger, read_tagged_corpus
+from autosarkasmus.preprocessor.tagger.tagger_m import read_mapping
+from tagger_accuracy import TaggerAccuracy
+
+FOLDS = 10
+
+corpus = read_tagged_corpus('gold_corpus.tags')
+corpus_universal = read_tagged_corpus('gold_corpus_universal.tags')
+mapping_file = sys.argv[1] if len(sys.argv) > 1 else None
+
+def fit_mapping(tweet_ids):
+    '''
+    STTS -> universal mapping of the given gold tweets (most frequent universal tag per STTS tag)
+    '''
+    mapping_counts = defaultdict(Counter)
+    for tweet_i in tweet_ids:
+        for (token, tag), (token_universal, tag_universal) in zip(corpus[tweet_i], corpus_universal[tweet_i]):
+            mapping_counts[tag][tag_universal] += 1
+    return {tag: counts.most_common(1)[0][0] for tag, counts in mapping_counts.items()}
+
+'''
+Cross-validation
+'''
+tweets_tagged = [None] * len(corpus)
+train_time = 0.
+tag_time = 0.
+mappings = [None] * len(corpus) # mapping applied to the tags of every tweet
+for fold in range(FOLDS):
+    train_ids = [tweet_i for tweet_i in range(len(corpus)) if tweet_i % FOLDS != fold]
+    tagger = PerceptronTagger()
+    start = time.time()
+    tagger.train([corpus[tweet_i] for tweet_i in train_ids])
+    train_time += time.time() - start
+    start = time.time()
+    for tweet_i in range(fold, len(corpus), FOLDS):
+        tokens = [token for token, tag in corpus[tweet_i]]
+        tweets_tagged[tweet_i] = list(zip(tokens, tagger.tag(tokens)))
+    tag_time += time.time() - start
+    mapping = read_mapping(mapping_file) if mapping_file else fit_mapping(train_ids) # never fitted on the test fold
+    for tweet_i in range(fold, len(corpus), FOLDS):
+        mappings[tweet_i] = mapping
+
+with open('perceptron_output.tagged', 'w', encoding='utf8') as fop:
+    for tweet, mapping in zip(tweets_tagged, mappings):
+        for token, tag in tweet:
+            fop.write(token + '\t' + mapping.get(tag, 'X') + '\n') # unknown tags are mapped to X like by Tagger.apply_map
+        fop.write('\n')
+
+tokens_total = sum(len(tweet) for tweet in corpus)
+print("Perceptron: training %.2fs per fold, %d tokens/s" % (train_time / FOLDS, tokens_total / tag_time))
+
+'''
+Throughput of TreeTagger (one call per tweet like Tagger.tag), if it is installed
+'''
+try:
+    import treetaggerwrapper
+    from autosarkasmus.preprocessor.tagger.tagger_m import TREETAGGER_PATH
+    tree_tagger = treetaggerwrapper.TreeTagger(TAGDIR=TREETAGGER_PATH, TAGLANG='de', TAGINENC='utf8')
+    start = time.time()
+    for tweet in corpus:
+        tree_tagger.tag_text('\n'.join(token for token, tag in tweet), tagonly=True)
+    print("TreeTagger: %d tokens/s" % (tokens_total / (time.time() - start)))
+except Exception as ex:
+    print("TreeTagger: not available (%s)" % ex)
+
+sys.argv = [sys.argv[0], 'perceptron_output.tagged', 'gold_corpus_universal.tags']
+acc = TaggerAccuracy()
+acc.negTags = 'accuracy_neg_perceptron.tags'
+acc.compare()
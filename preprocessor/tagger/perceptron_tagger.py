@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+'''
+PerceptronTagger (class)
+
+In-process averaged perceptron POS tagger
+'''
+
+import os
+import random
+import hashlib
+import numpy as np
+
+GOLD_CORPUS = os.path.join(os.path.dirname(__file__), 'gold_corpus.tags')
+START = ['-START-', '-START2-'] # pseudo tags/tokens before the first token
+END = ['-END-', '-END2-'] # pseudo tokens after the last token
+
+def default_model_path(corpus_path=GOLD_CORPUS):
+    '''
+    Path at which the model trained on a corpus is cached (next to the corpus, named by its checksum so that
+    a changed corpus never reuses an outdated model)
+
+    Keyword arguments:
+        corpus_path (str): path to the tagged training corpus (default=GOLD_CORPUS)
+
+    Returns:
+        str: path to the model file
+    '''
+    with open(corpus_path, 'rb') as fop:
+        checksum = hashlib.sha1(fop.read()).hexdigest()
+    return '%s.%s.npz' % (corpus_path, checksum[:12])
+
+def read_tagged_corpus(path):
+    '''
+    Reads a tagged corpus with one token <TAB> tag per line and blank lines between tweets
+
+    Keyword arguments:
+        path (str): path to the tagged corpus (e.g. gold_corpus.tags)
+
+    Returns:
+        list: of tweets as lists of (token, tag) tuples
+    '''
+    res = [[]]
+    with open(path, 'r', encoding='utf8') as fop:
+        for line in fop:
+            line_parts = line.rstrip('\n').split('\t')
+            if len(line_parts) < 2:
+                if res[-1]:
+                    res.append([])
+                continue
+            res[-1].append((line_parts[0].strip(), line_parts[1].strip()))
+    return [tweet for tweet in res if tweet]
+
+
+class PerceptronTagger:
+    '''
+    Greedy left-to-right averaged perceptron tagger
+
+    Weights are stored in a feature x tag matrix; a token is tagged by summing the rows of its
+    features (word, affixes, shape, surrounding words and the two previously assigned tags).
+    '''
+
+    def __init__(self):
+        '''
+        Constructor of PerceptronTagger
+
+        The tagger has to be trained (see train) or loaded (see load) before tagging.
+        '''
+        self.features = {} # feature -> row of the weight matrix
+        self.tags = [] # column -> tag
+        self.weights = np.zeros((0, 0))
+
+    def _features(self, tokens, i, previous, previous2):
+        '''
+        Extracts the features of token i
+
+        Keyword arguments:
+            tokens (list): tokens of the tweet padded by START and END
+            i (int): position of the token in the padded list
+            previous (str): tag of the previous token
+            previous2 (str): tag of the token before the previous one
+
+        Returns:
+            list: of feature strings
+        '''
+        token = tokens[i]
+        word = token.lower()
+        return [
+            'bias',
+            'w ' + word,
+            'suf ' + word[-3:],
+            'suf2 ' + word[-2:],
+            'pre ' + word[:1],
+            'shape ' + ('d' if token.isdigit() else 'u' if token[:1].isupper() else 'l' if token[:1].islower() else 'p'),
+            't-1 ' + previous,
+            't-2 ' + previous2,
+            't-1 t-2 ' + previous + ' ' + previous2,
+            't-1 w ' + previous + ' ' + word,
+            'w-1 ' + tokens[i-1].lower(),
+            'suf-1 ' + tokens[i-1][-3:].lower(),
+            'w-2 ' + tokens[i-2].lower(),
+            'w+1 ' + tokens[i+1].lower(),
+            'suf+1 ' + tokens[i+1][-3:].lower(),
+            'w+2 ' + tokens[i+2].lower(),
+        ]
+
+    def _rows(self, features, add=False):
+        '''
+        Returns the weight matrix rows of features
+
+        Keyword arguments:
+            features (list): of feature strings
+            add (bool): whether unknown features get new rows (training) or are ignored (default=False)
+
+        Returns:
+            list: of row indices
+        '''
+        if not add:
+            return [self.features[feature] for feature in features if feature in self.features]
+        res = []
+        for feature in features:
+            row = self.features.get(feature)
+            if row is None:
+                row = self.features[feature] = len(self.features)
+            res.append(row)
+        return res
+
+    def _grow(self, arrays):
+        '''
+        Doubles the number of rows of the training arrays if all rows are assigned
+
+        Keyword arguments:
+            arrays (list): of arrays with one row per feature
+
+        Returns:
+            list: of arrays with at least one row per feature
+        '''
+        if len(self.features) <= len(arrays[0]):
+            return arrays
+        rows = max(len(self.features), 2 * len(arrays[0]))
+        return [np.concatenate([array, np.zeros((rows - len(array),) + array.shape[1:], dtype=array.dtype)]) for array in arrays]
+
+    def train(self, tweets, iterations=5, seed=0):
+        '''
+        Trains the tagger on tagged tweets
+
+        Weights are averaged over all updates (lazily, per feature row) to reduce overfitting.
+
+        Keyword arguments:
+            tweets (list): of lists of (token, tag) tuples (see read_tagged_corpus)
+            iterations (int): number of passes over the shuffled training data (default=5)
+            seed (int): seed of the shuffling (default=0)
+        '''
+        self.tags = sorted({tag for tweet in tweets for token, tag in tweet})
+        columns = {tag: column for column, tag in enumerate(self.tags)}
+        self.features = {}
+        weights = np.zeros((1024, len(self.tags)))
+        totals = np.zeros((1024, len(self.tags))) # weights summed over all updates
+        timestamps = np.zeros(1024, dtype=np.int64) # update of the last change of every row
+        tweets = list(tweets)
+        shuffle = random.Random(seed).shuffle
+        step = 0
+        for _ in range(iterations):
+            shuffle(tweets)
+            for tweet in tweets:
+                tokens = START + [token for token, tag in tweet] + END
+                previous, previous2 = START
+                for i, (token, tag) in enumerate(tweet):
+                    rows = self._rows(self._features(tokens, i+2, previous, previous2), add=True)
+                    weights, totals, timestamps = self._grow([weights, totals, timestamps])
+                    guess = int(weights[rows].sum(axis=0).argmax())
+                    truth = columns[tag]
+                    step += 1
+                    if guess != truth:
+                        rows = np.unique(rows)
+                        totals[rows] += (step - timestamps[rows])[:, None] * weights[rows]
+                        timestamps[rows] = step
+                        weights[rows, truth] += 1
+                        weights[rows, guess] -= 1
+                    previous2, previous = previous, self.tags[guess]
+        rows = len(self.features)
+        totals[:rows] += (step - timestamps[:rows])[:, None] * weights[:rows]
+        self.weights = totals[:rows] / max(step, 1)
+
+    def tag(self, tokens):
+        '''
+        Tags a tokenized tweet
+
+        Keyword arguments:
+            tokens (list): of tokens
+
+        Returns:
+            list: of tags (one per token)
+        '''
+        res = []
+        padded = START + list(tokens) + END
+        previous, previous2 = START
+        for i in range(len(tokens)):
+            rows = self._rows(self._features(padded, i+2, previous, previous2))
+            tag = self.tags[int(self.weights[rows].sum(axis=0).argmax())]
+            res.append(tag)
+            previous2, previous = previous, tag
+        return res
+
+    def save(self, path):
+        '''
+        Stores the trained tagger
+
+        Keyword arguments:
+            path (str): path to the model file (numpy .npz)
+        '''
+        with open(path, 'wb') as fop:
+            np.savez(fop, weights=self.weights, features=np.array(list(self.features), dtype=str), tags=np.array(self.tags, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Loads a tagger stored by save()
+
+        Keyword arguments:
+            path (str): path to the model file
+
+        Returns:
+            PerceptronTagger: trained tagger
+        '''
+        res = cls()
+        with np.load(path) as model:
+            res.weights = model['weights']
+            res.features = {feature: row for row, feature in enumerate(model['features'].tolist())}
+            res.tags = model['tags'].tolist()
+        return res
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+'''
+TagCache (class)
+
+Cache of the tag sequences of normalized tweets
+'''
+
+import hashlib
+
+from autosarkasmus.preprocessor.normalizer.spelling_cache import SpellingCache
+
+class TagCache(SpellingCache):
+    '''
+    LRU-bounded cache of tag sequences keyed by a hash of the normalized tokens
+
+    Many normalized tweets are identical (e.g. "%MENTION% %URL%"), so their tags are only requested
+    from the tagger once. With a path, the tag sequences are also stored in an sqlite database shared
+    by processes and later runs (see SpellingCache). The version should identify the tagger and its
+    mapping, so tags of another tagger are never returned.
+    '''
+    table = 'tags'
+
+    def key(self, tweet_norm):
+        '''
+        Content hash of a normalized tweet
+
+        Keyword arguments:
+            tweet_norm (list): normalized tweet
+
+        Returns:
+            str: hex digest
+        '''
+        return hashlib.blake2b('\n'.join(tweet_norm).encode('utf8', 'surrogatepass'), digest_size=16).hexdigest()
+
+    def get_tags(self, tweet_norm):
+        '''
+        Returns the cached tagged tweet or None
+
+        Keyword arguments:
+            tweet_norm (list): normalized tweet
+
+        Returns:
+            list: of token, tag tuples
+        '''
+        tags = self.get(self.key(tweet_norm))
+        if tags is None:
+            return None
+        return list(zip(tweet_norm, tags))
+
+    def put_tags(self, tweet_norm, tweet_tag):
+        '''
+        Stores a tagged tweet
+
+        Keyword arguments:
+            tweet_norm (list): normalized tweet
+            tweet_tag (list): of token, tag tuples
+        '''
+        self.put(self.key(tweet_norm), [tag for token, tag in tweet_tag])
@@ -5,31 +5,71 @@ Tagger (class)
 Wrapper class for TreeTagger with mapping
 '''
 
+import os
 import treetaggerwrapper
 import re
 
+from autosarkasmus.preprocessor.tagger.perceptron_tagger import PerceptronTagger, read_tagged_corpus, default_model_path, GOLD_CORPUS
+
 TREETAGGER_PATH = '/resources/processors/tagger/tree-tagger-3.2'
+TWEET_BOUNDARY = '.' # separates tweets tagged in one call (treetaggerwrapper also ends every text with a full stop)
+
+def read_mapping(mapping_file):
+    '''
+    Reads a mapping file (tag and mapped tag separated by whitespace, one mapping per line)
+
+    Keyword arguments:
+        mapping_file (str): path to mapping file
+
+    Returns:
+        dict: of tag -> mapped tag
+    '''
+    mapping = {}
+    for line in open(mapping_file):
+        args = line.split() # split tags and mapping at whitespace
+        mapping[args[0]] = args[1] # save mapping internally
+    return mapping
 
 class Tagger:
     '''
     Wrapper class for TreeTagger that performs mapping
     '''
 
-    def __init__(self, mapping_file):
+    def __init__(self, mapping_file, backend='treetagger', model_path=None):
         '''
         Constructor of Tagger
 
         The mapping file should be tab-separated tag -> map.
         One mapping per line.
 
+        The 'perceptron' backend tags in-process with a PerceptronTagger trained on the STTS annotations of the
+        gold corpus, so no TreeTagger binary is required. It is trained when the tagger is created, unless a model
+        was stored at model_path before (the trained model is stored there). Without model_path, the model is
+        cached next to the gold corpus (see default_model_path).
+
         Keyword arguments:
             mapping_file (str): path to mapping file
+            backend (str): 'treetagger' or 'perceptron' (default='treetagger')
+            model_path (str): path to the stored perceptron model (default=None)
         '''
-        self.mapping = {}
-        for line in open(mapping_file):
-            args = line.split() # split tags and mapping at whitespace
-            self.mapping[args[0]] = args[1] # save mapping internally
-        self.tree_tagger = treetaggerwrapper.TreeTagger(TAGDIR=TREETAGGER_PATH, TAGLANG='de', TAGINENC='utf8') # initialize a TreeTagger wrapper
+        self.mapping = read_mapping(mapping_file)
+        self.tree_tagger = None
+        self.perceptron = None
+        if backend == 'perceptron':
+            model_cached = not model_path
+            model_path = model_path or default_model_path()
+            if os.path.exists(model_path):
+                self.perceptron = PerceptronTagger.load(model_path)
+            else:
+                self.perceptron = PerceptronTagger()
+                self.perceptron.train(read_tagged_corpus(GOLD_CORPUS))
+                try:
+                    self.perceptron.save(model_path)
+                except OSError:
+                    if not model_cached: # the cache is optional (e.g. read-only installation)
+                        raise
+        else:
+            self.tree_tagger = treetaggerwrapper.TreeTagger(TAGDIR=TREETAGGER_PATH, TAGLANG='de', TAGINENC='utf8') # initialize a TreeTagger wrapper
 
     def tag(self, tweet_tkn):
         '''
@@ -41,17 +81,70 @@ class Tagger:
         Returns:
             list: of token, tag tuples
         '''
-        res = []
+        if self.perceptron is not None:
+            return [self.map_token(token, tag) for token, tag in zip(tweet_tkn, self.perceptron.tag(tweet_tkn))]
         tagged_sentence = self.tree_tagger.tag_text('\n'.join(tweet_tkn), tagonly=True) # join tokens to string with one token per line; set tagger to perform no additional normalization
-        for tagged_token in tagged_sentence:
-            tagged_token_parts = tagged_token.split('\t')
-            special_match = re.match(r'%(.+?)%', tagged_token_parts[0]) # check for special tokens (e.g. %HASHTAG%)
-            if special_match:
-                res.append((tagged_token_parts[0], special_match.group(1))) # set special tags accordingly
-            else:
-                res.append((tagged_token_parts[0], self.apply_map(tagged_token_parts[1]))) # set mapped tags
+        return [self.parse_tagged_token(tagged_token) for tagged_token in tagged_sentence]
+
+    def tag_many(self, tweets_tkn):
+        '''
+        Performs tagging for a batch of tokenized tweets in a single TreeTagger call
+
+        The tweets are separated by sentence boundaries, so every tweet is tagged in the same
+        context as by tag(). The output is split back into tweets by their token counts.
+
+        Keyword arguments:
+            tweets_tkn (list): of tokenized (optionally normalized) tweets
+
+        Returns:
+            list: of lists of token, tag tuples (one per tweet)
+        '''
+        if self.perceptron is not None: # no process to communicate with
+            return [self.tag(tweet_tkn) for tweet_tkn in tweets_tkn]
+        lines = []
+        for tweet_tkn in tweets_tkn:
+            lines.extend(tweet_tkn)
+            lines.append(TWEET_BOUNDARY)
+        tagged_text = self.tree_tagger.tag_text('\n'.join(lines), tagonly=True)
+        res = []
+        position = 0
+        for tweet_tkn in tweets_tkn:
+            res.append([self.parse_tagged_token(tagged_token) for tagged_token in tagged_text[position:position+len(tweet_tkn)]])
+            position += len(tweet_tkn)
+            if position >= len(tagged_text) or tagged_text[position].split('\t')[0] != TWEET_BOUNDARY:
+                raise ValueError('TreeTagger output is not aligned with the input tokens')
+            position += 1
         return res
 
+    def parse_tagged_token(self, tagged_token):
+        '''
+        Converts a line of TreeTagger output into a token, tag tuple
+
+        Keyword arguments:
+            tagged_token (str): tab-separated token and TreeTagger tag
+
+        Returns:
+            tuple: token, mapped tag (special tokens like %HASHTAG% are tagged with their name)
+        '''
+        tagged_token_parts = tagged_token.split('\t')
+        return self.map_token(tagged_token_parts[0], tagged_token_parts[1] if len(tagged_token_parts) > 1 else None)
+
+    def map_token(self, token, tag):
+        '''
+        Maps the tag of a token
+
+        Keyword arguments:
+            token (str): token
+            tag (str): pos-tag of the tagger backend
+
+        Returns:
+            tuple: token, mapped tag (special tokens like %HASHTAG% are tagged with their name)
+        '''
+        special_match = re.match(r'%(.+?)%', token) # check for special tokens (e.g. %HASHTAG%)
+        if special_match:
+            return (token, special_match.group(1)) # set special tags accordingly
+        return (token, self.apply_map(tag)) # set mapped tags
+
     def apply_map(self, tag):
         '''
         Applies mapping given a tag
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+'''
+TaggerPool (class)
+
+Pool of TreeTagger processes which tag concurrently
+'''
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+from autosarkasmus.preprocessor.tagger.tagger_m import Tagger
+
+RESTART_DELAY = 1.0 # seconds between attempts to start a TreeTagger process which failed to start
+
+class _TaggerWorker:
+    '''
+    Thread which serves tagging requests of a TaggerPool with its own TreeTagger process
+    '''
+
+    def __init__(self, pool):
+        '''
+        Constructor of _TaggerWorker
+
+        The TreeTagger process is started by the worker thread, so creating a worker never blocks or fails.
+
+        Keyword arguments:
+            pool (TaggerPool): pool whose request queue is served
+        '''
+        self.pool = pool
+        self.tagger = None # started by the thread (see _start)
+        self.future = None # future of the request currently being tagged
+        self.started = None # start time of the current request
+        self.abandoned = False # set by the watchdog if the request timed out and the worker was replaced
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def _start(self):
+        '''
+        Starts the TreeTagger process of the worker
+
+        Returns:
+            Exception: the startup error or None if TreeTagger is running
+        '''
+        try:
+            self.tagger = Tagger(self.pool.mapping_file)
+        except Exception as exception:
+            self.tagger = None
+            return exception
+        return None
+
+    def run(self):
+        '''
+        Tags requests until the pool is closed or the worker is abandoned
+
+        While TreeTagger can not be started, requests fail with the startup error (callers never wait
+        for a worker without tagger) and the start is retried every RESTART_DELAY seconds.
+        '''
+        startup_error = None
+        retry_at = 0
+        while not self.abandoned:
+            if self.tagger is None and time.time() >= retry_at:
+                startup_error = self._start()
+                retry_at = time.time() + RESTART_DELAY
+            try:
+                request = self.pool.requests.get(timeout=RESTART_DELAY if self.tagger is None else None)
+            except queue.Empty:
+                continue
+            if request is None: # pool is closed
+                break
+            method, tweets, future = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self.tagger is None:
+                future.set_exception(startup_error)
+                continue
+            with self.pool.lock:
+                self.future, self.started = future, time.time()
+            try:
+                result, error = getattr(self.tagger, method)(tweets), None
+            except Exception as exception:
+                result, error = None, exception
+            with self.pool.lock:
+                self.future, self.started = None, None
+                if self.abandoned: # the watchdog already failed the request
+                    break
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+                self.kill() # the process may have crashed or be out of sync, it is restarted before the next request
+                self.tagger = None
+                retry_at = 0
+                with self.pool.lock:
+                    self.pool.restarts += 1
+
+    def kill(self):
+        '''
+        Kills the TreeTagger process of the worker
+        '''
+        process = getattr(getattr(self.tagger, 'tree_tagger', None), 'tagpopen', None)
+        if process is not None:
+            try:
+                process.kill()
+            except OSError: # already gone
+                pass
+
+
+class TaggerPool:
+    '''
+    Pool of TreeTagger processes that share a request queue
+
+    Every process is driven by a thread; the threads wait for TreeTagger output without holding the GIL,
+    so requests of concurrent callers are tagged in parallel. Provides the interface of Tagger and
+    future-returning variants. Crashed TreeTagger processes are restarted after the failed request,
+    hung ones are killed after timeout seconds and replaced by a new worker. If TreeTagger can not be
+    started, requests fail with the startup error until a restart succeeds.
+    '''
+
+    def __init__(self, mapping_file, size=2, timeout=30):
+        '''
+        Constructor of TaggerPool
+
+        Keyword arguments:
+            mapping_file (str): path to mapping file (see Tagger)
+            size (int): number of TreeTagger processes (default=2)
+            timeout (float): seconds after which a request fails and its process is replaced, None to wait forever (default=30)
+        '''
+        self.mapping_file = mapping_file
+        self.size = size
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.restarts = 0
+        self.closed = False
+        self.workers = [_TaggerWorker(self) for _ in range(size)]
+        if timeout is not None:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def _watch(self):
+        '''
+        Replaces workers whose current request exceeds the timeout
+        '''
+        while not self.closed:
+            time.sleep(min(self.timeout / 10, 1))
+            now = time.time()
+            with self.lock:
+                hung = [worker for worker in self.workers if worker.started is not None and now - worker.started > self.timeout]
+                for worker in hung:
+                    worker.abandoned = True
+                    worker.future.set_exception(TimeoutError('TreeTagger did not respond within %s seconds' % self.timeout))
+                    self.workers[self.workers.index(worker)] = None
+                    self.restarts += 1
+            for worker in hung:
+                worker.kill() # unblocks the abandoned thread
+            with self.lock:
+                if self.closed: # close only stops the workers it has seen
+                    return
+                for worker in hung:
+                    self.workers[self.workers.index(None)] = _TaggerWorker(self) # starts its TreeTagger process in its own thread
+
+    def _submit(self, method, tweets):
+        '''
+        Queues a tagging request
+
+        Keyword arguments:
+            method (str): name of the Tagger method
+            tweets (list): tokenized tweet or list of tokenized tweets
+
+        Returns:
+            Future: of the Tagger method's result
+        '''
+        if self.closed:
+            raise RuntimeError('TaggerPool is closed')
+        future = Future()
+        self.requests.put((method, tweets, future))
+        return future
+
+    def tag_async(self, tweet_tkn):
+        '''
+        Queues tagging of a tokenized tweet
+
+        Returns:
+            Future: of a list of token, tag tuples (see Tagger.tag)
+        '''
+        return self._submit('tag', tweet_tkn)
+
+    def tag_many_async(self, tweets_tkn):
+        '''
+        Queues tagging of a batch of tokenized tweets
+
+        Returns:
+            Future: of a list of lists of token, tag tuples (see Tagger.tag_many)
+        '''
+        if not tweets_tkn: # e.g. all tweets of a batch were cached
+            future = Future()
+            future.set_result([])
+            return future
+        return self._submit('tag_many', tweets_tkn)
+
+    def tag(self, tweet_tkn):
+        '''
+        Performs tagging for a tokenized tweet and waits for the result (see Tagger.tag)
+        '''
+        return self.tag_async(tweet_tkn).result()
+
+    def tag_many(self, tweets_tkn):
+        '''
+        Performs tagging for a batch of tokenized tweets and waits for the result (see Tagger.tag_many)
+        '''
+        return self.tag_many_async(tweets_tkn).result()
+
+    def close(self):
+        '''
+        Stops all workers once the queued requests are tagged
+        '''
+        with self.lock: # no replacement is started after this (see _watch)
+            self.closed = True
+            workers = [worker for worker in self.workers if worker is not None]
+        for _ in workers:
+            self.requests.put(None)
+        for worker in workers:
+            worker.thread.join()
+            worker.kill()
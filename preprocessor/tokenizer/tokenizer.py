@@ -4,7 +4,26 @@
 RegEx based tokenizer for tweets
 """
 
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
 import re
+from array import array
+from csv import reader
+
+from autosarkasmus.corpus.corpus_reader import CorpusReader
+
+# token classes in span mode (index of the matching alternative in regex_all)
+TOKEN_URL = 1
+TOKEN_EMAIL = 2
+TOKEN_USER = 3
+TOKEN_HASHTAG = 4
+TOKEN_EMOTICON = 5
+TOKEN_EMOJI = 6
+TOKEN_PUNCTUATION = 7
+TOKEN_WORD = 8
+TOKEN_CLASSES = (None, 'URL', 'EMAIL', 'USER', 'HASHTAG', 'EMOTICON', 'EMOJI', 'PUNCTUATION', 'WORD')
 
 class Tokenizer:
     '''
@@ -37,7 +56,7 @@ class Tokenizer:
         self.regex_url = r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+" #urls
 
         #combined regex (one regex to rule them all)
-        self.regex_all = "(" + "|".join([
+        regex_parts = [ # order corresponds to the TOKEN_* classes
             self.regex_url,
             self.regex_email,
             self.regex_user,
@@ -46,7 +65,10 @@ class Tokenizer:
             self.regex_emoji,
             self.regex_punctuation,
             self.regex_word
-        ]) + ")"
+        ]
+        self.regex_all = "(" + "|".join(regex_parts) + ")"
+        self.pattern_all = re.compile(self.regex_all) # compiled once and shared by all tokenization calls
+        self.pattern_classes = re.compile("|".join("(" + regex_part + ")" for regex_part in regex_parts)) # one group per token class
 
     def tokenize(self, tweet):
         '''Returns a list of tokens in a tweet.
@@ -58,5 +80,68 @@ class Tokenizer:
             list: of tokens (str)
         '''
         res = []
-        res = re.findall(self.regex_all, tweet)
+        res = self.pattern_all.findall(tweet)
         return res
+
+    def tokenize_spans(self, tweet):
+        '''Returns the token offsets in a tweet without creating token strings.
+
+        Keyword arguments:
+            tweet (str): the raw tweet (str) to be tokenized
+
+        Returns:
+            array: of int with three consecutive entries (start, end, TOKEN_* class) per token
+        '''
+        res = array('i')
+        for match in self.pattern_classes.finditer(tweet):
+            res.extend((match.start(), match.end(), match.lastindex))
+        return res
+
+    def tokens_from_spans(self, tweet, spans):
+        '''Returns the token strings for spans created by tokenize_spans.
+
+        Keyword arguments:
+            tweet (str): the raw tweet the spans refer to
+            spans (array): flat (start, end, class) offsets of the tweet
+
+        Returns:
+            list: of tokens (str)
+        '''
+        return [tweet[spans[i]:spans[i+1]] for i in range(0, len(spans), 3)]
+
+    def tokenize_many(self, tweets, spans=False):
+        '''Tokenizes an iterable of tweets lazily.
+
+        Keyword arguments:
+            tweets (iterable): of raw tweets (str), e.g. a generator over a corpus file
+            spans (bool): yield (tweet, spans) pairs as in tokenize_spans instead of token lists (default=False)
+
+        Returns:
+            generator: yielding one list of tokens (str) or one (str, array) pair per tweet
+        '''
+        if spans:
+            for tweet in tweets:
+                yield tweet, self.tokenize_spans(tweet)
+        else:
+            findall = self.pattern_all.findall # avoid attribute lookups in the loop
+            for tweet in tweets:
+                yield findall(tweet)
+
+    def tokenize_file(self, path, json_corpus=False, spans=False):
+        '''Tokenizes a corpus file tweet by tweet without loading it into memory.
+
+        Keyword arguments:
+            path (str): path to a corpus in csv format ("date","id","text") or a raw JSON-dump
+            json_corpus (bool): denotes whether corpus is in json format (default=False)
+            spans (bool): yield (tweet, spans) pairs as in tokenize_spans instead of token lists (default=False)
+
+        Returns:
+            generator: yielding one list of tokens (str) or one (str, array) pair per tweet
+        '''
+        if json_corpus:
+            tweets = (tweet_json['text'] for tweet_json in CorpusReader(path).iterload())
+            yield from self.tokenize_many(tweets, spans=spans)
+        else:
+            with open(path, 'r', encoding='utf8') as fop:
+                tweets = (line[2].strip() for line in reader(fop))
+                yield from self.tokenize_many(tweets, spans=spans)
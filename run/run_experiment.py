@@ -37,13 +37,13 @@ if __name__ == '__main__':
     print('setting up data...')
     data = []
     if args.model == 'rnn':
+        # one normalizer (trained on both corpora) and tagger serve both pipelines
+        pipeline_pos = Pipeline(args.corpus_file_pos, '../rsrc/de-tiger.map', verbose=True, training_corpus_paths=[args.corpus_file_pos, args.corpus_file_neg])
+        pipeline_neg = Pipeline(args.corpus_file_neg, '../rsrc/de-tiger.map', verbose=True, shared_pipeline=pipeline_pos)
         for is_sarcastic in [True, False]:
             print('  preprocessing samples with sarcastic='+str(is_sarcastic)+'...')
             # preprocess tweets
-            if is_sarcastic:
-                pipeline = Pipeline(args.corpus_file_pos, '../rsrc/de-tiger.map', verbose=True)
-            else:
-                pipeline = Pipeline(args.corpus_file_neg, '../rsrc/de-tiger.map', verbose=True)
+            pipeline = pipeline_pos if is_sarcastic else pipeline_neg
             tweets_tkn, tweets_proc = pipeline.process()
             for tweet_proc in tweets_proc:
                 data.append(
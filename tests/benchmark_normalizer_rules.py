@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+import re
+import time
+
+from autosarkasmus.corpus.corpus_reader import CorpusReader
+from autosarkasmus.preprocessor.tokenizer.tokenizer import Tokenizer
+from autosarkasmus.preprocessor.normalizer.normalizer import Normalizer, TOKEN_HASHTAG, TOKEN_USER, TOKEN_WORD
+
+def match_rule_sequential(normalizer, normalized):
+	'''replacement rules as applied by Normalizer.normalize before the single-pass dispatcher'''
+	match_hashtag = re.match(r'^#(\S+)', normalized)
+	if match_hashtag:
+		return match_hashtag.group(1)
+	if re.match(r'^@\S+', normalized):
+		return "%MENTION%"
+	if re.match(r"^[:;x]'?-?[\)D]$", normalized):
+		return "%SMILEYPOS%"
+	if re.match(r"^[:;]'?-?[\(<sSoO]$", normalized):
+		return "%SMILEYNEG%"
+	if re.match(r"^[:;]'?-?[^\)\(DsSoOcC<]$", normalized):
+		return "%SMILEY%"
+	if normalized in list(normalizer.emoji_pos):
+		return "%SMILEYPOS%"
+	if normalized in list(normalizer.emoji_neg):
+		return "%SMILEYNEG%"
+	if re.match(r"\\U0001F[0-9A-F]{3}", normalized):
+		return "%SMILEY%"
+	if re.match(r"(https?://)?([a-z]+\.)?[a-z0-9-]+\.[a-z]+(\.[a-z]+)?(/\S*)*", normalized):
+		return "%URL%"
+	if re.match(r"^[!\?,\.\-\_:;\(\)\[\]\{\}\+\=\~'\"]+$", normalized):
+		return normalized[:3]
+	return None
+
+def match_rule_classes(normalizer, token, token_class):
+	'''replacement rules as applied by Normalizer.normalize with token classes of the tokenizer'''
+	if token_class == TOKEN_HASHTAG:
+		return token[1:]
+	if token_class == TOKEN_USER:
+		return "%MENTION%"
+	if token_class == TOKEN_WORD and token.isalnum() and token != "xD":
+		return None
+	return normalizer.match_rule(token)
+
+if __name__ == "__main__":
+	corpus_path = sys.argv[1] if len(sys.argv) > 1 else "test.txt"
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+	tokenizer = Tokenizer()
+	normalizer = Normalizer()
+	tokens = []
+	for tweet, spans in tokenizer.tokenize_many(CorpusReader(corpus_path).text_txt(), spans=True):
+		tokens += zip(tokenizer.tokens_from_spans(tweet, spans), spans[2::3])
+	tokens *= repeat
+
+	start = time.perf_counter()
+	results_sequential = [match_rule_sequential(normalizer, token) for token, token_class in tokens]
+	time_sequential = time.perf_counter() - start
+
+	start = time.perf_counter()
+	results_single = [normalizer.match_rule(token) for token, token_class in tokens]
+	time_single = time.perf_counter() - start
+
+	start = time.perf_counter()
+	results_classes = [match_rule_classes(normalizer, token, token_class) for token, token_class in tokens]
+	time_classes = time.perf_counter() - start
+
+	assert results_sequential == results_single == results_classes
+	print("tokens: {}".format(len(tokens)))
+	print("sequential re.match rules:       {:.0f} tokens/sec".format(len(tokens)/time_sequential))
+	print("single-pass dispatcher:          {:.0f} tokens/sec".format(len(tokens)/time_single))
+	print("dispatcher with tokenizer class: {:.0f} tokens/sec".format(len(tokens)/time_classes))
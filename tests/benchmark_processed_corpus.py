@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import sys
+import os.path
+import time
+import random
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from autosarkasmus.preprocessor.processed_corpus import ProcessedCorpus, write_processed
+
+if __name__ == "__main__":
+	n_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+	rand = random.Random(0)
+	vocab = ["token{}".format(i) for i in range(50000)]
+	tags = ["NOUN", "VERB", "ADJ", "ADV", "DET", "PRON", ".", "X", "HASHTAG", "MENTION"]
+	tweets = [[(rand.choice(vocab), rand.choice(tags)) for _ in range(rand.randint(5, 25))] for _ in range(n_tweets)]
+	path_tsv = os.path.join(tempfile.mkdtemp(), "corpus.tsv")
+	path_bin = path_tsv[:-3] + "bin"
+
+	start = time.time()
+	with open(path_tsv, "w", encoding="utf8") as fop: # format of Pipeline.write_file
+		for tweet in tweets:
+			for token, tag in tweet:
+				fop.write(token + "\t" + tag + "\n")
+			fop.write("\n")
+	print("tsv:    write {:.3f}s, {:.1f} MB".format(time.time() - start, os.path.getsize(path_tsv) / 1e6))
+	start = time.time()
+	write_processed(path_bin, tweets)
+	print("binary: write {:.3f}s, {:.1f} MB".format(time.time() - start, os.path.getsize(path_bin) / 1e6))
+
+	start = time.time()
+	corpus = ProcessedCorpus(path_bin)
+	print("binary: open {:.2f}ms ({} tweets)".format((time.time() - start) * 1000, len(corpus)))
+	start = time.time()
+	indices = [rand.randrange(n_tweets) for _ in range(10000)]
+	assert all(corpus[i] == tweets[i] for i in indices)
+	print("binary: 10000 random accesses {:.3f}s".format(time.time() - start))
+	start = time.time()
+	assert list(corpus) == tweets
+	print("binary: decode all {:.3f}s".format(time.time() - start))
+	corpus.close()
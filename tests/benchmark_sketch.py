@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from autosarkasmus.corpus.corpus_reader import CorpusReader
+from autosarkasmus.preprocessor.tokenizer.tokenizer import Tokenizer
+from autosarkasmus.preprocessor.normalizer.normalizer import Normalizer
+from autosarkasmus.preprocessor.tagger.perceptron_tagger import read_tagged_corpus, GOLD_CORPUS
+
+# usage: benchmark_sketch.py [corpus (csv or tagged, default: gold corpus)] [widths...]
+
+if __name__ == "__main__":
+	corpus_path = sys.argv[1] if len(sys.argv) > 1 else GOLD_CORPUS
+	widths = [int(arg) for arg in sys.argv[2:]] or [1 << 8, 1 << 10, 1 << 12, 1 << 14, 1 << 16]
+	if corpus_path.endswith(".tags"): # tokenized dev corpus
+		tweets = [[token for token, tag in tweet] for tweet in read_tagged_corpus(corpus_path)]
+	else:
+		tweets = list(Tokenizer().tokenize_many(CorpusReader(corpus_path).text_txt()))
+	exact = Normalizer()
+	contexts = [context for tweet in tweets for context in exact.get_contexts(tweet)]
+	for token, context in contexts:
+		exact.collect_bigrams(token, context)
+	probs_exact = [exact.getprob(token, context) for token, context in contexts]
+	# decisions of the context model as used by checkprob (original vs. lowercased token)
+	decisions_exact = [exact.checkprob(token, token.lower(), context) for token, context in contexts]
+
+	print("tweets: {}, tokens: {}".format(len(tweets), len(contexts)))
+	for width in widths:
+		sketch = Normalizer(sketch_width=width, sketch_depth=4)
+		for token, context in contexts:
+			sketch.collect_bigrams(token, context)
+		probs_sketch = [sketch.getprob(token, context) for token, context in contexts]
+		decisions_sketch = [sketch.checkprob(token, token.lower(), context) for token, context in contexts]
+		error = sum(abs(p_sketch - p_exact) / p_exact for p_sketch, p_exact in zip(probs_sketch, probs_exact)) / len(contexts)
+		agreement = sum(d_sketch == d_exact for d_sketch, d_exact in zip(decisions_sketch, decisions_exact)) / len(contexts)
+		print("width {:>8} x depth 4 ({:>6} KiB): mean relative error {:.4f}, checkprob agreement {:.2%}".format(width, width * 4 * 8 // 1024, error, agreement))
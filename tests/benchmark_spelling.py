@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+import time
+
+from autosarkasmus.corpus.corpus_reader import CorpusReader
+from autosarkasmus.preprocessor.tokenizer.tokenizer import Tokenizer
+from autosarkasmus.preprocessor.normalizer.normalizer import Normalizer
+
+if __name__ == "__main__":
+	corpus_path = sys.argv[1] if len(sys.argv) > 1 else "test.txt"
+	tokenizer = Tokenizer()
+	normalizers = {backend: Normalizer(spelling_backend=backend, spelling_cache_size=0) for backend in ["hunspell", "symspell"]}
+	contexts = []
+	for tweet_tkn in tokenizer.tokenize_many(CorpusReader(corpus_path).text_txt()):
+		contexts += normalizers["hunspell"].get_contexts(tweet_tkn)
+	for normalizer in normalizers.values():
+		for token, context in contexts:
+			normalizer.collect_bigrams(token, context)
+	# misspelled tokens which reach the spellcheck of Normalizer.normalize
+	oov_contexts = [(token, context) for token, context in contexts if normalizers["hunspell"].match_rule(token) is None and normalizers["hunspell"].oov(token)]
+	normalizers["symspell"]._initialize_speller() # exclude index construction from the lookup timings
+
+	results = {}
+	for backend, normalizer in normalizers.items():
+		start = time.perf_counter()
+		results[backend] = [normalizer.suggest_spelling(token, context) for token, context in oov_contexts]
+		duration = time.perf_counter() - start
+		print("{:<9} {:>8.1f} µs/token".format(backend, duration / max(len(oov_contexts), 1) * 1e6))
+	agreement = sum(res_hun == res_sym for res_hun, res_sym in zip(results["hunspell"], results["symspell"]))
+	changed = sum(res != token for res, (token, context) in zip(results["hunspell"], oov_contexts))
+	print("misspelled tokens: {} (corrected by hunspell: {})".format(len(oov_contexts), changed))
+	print("same correction as hunspell: {} ({:.2%})".format(agreement, agreement / max(len(oov_contexts), 1)))
+	for res_hun, res_sym, (token, context) in zip(results["hunspell"], results["symspell"], oov_contexts):
+		if res_hun != res_sym:
+			print("\t{} -> hunspell: {}, symspell: {}".format(token, res_hun, res_sym))
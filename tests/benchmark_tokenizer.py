@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+import re
+import time
+
+from autosarkasmus.corpus.corpus_reader import CorpusReader
+from autosarkasmus.preprocessor.tokenizer.tokenizer import Tokenizer
+
+if __name__ == "__main__":
+	corpus_path = sys.argv[1] if len(sys.argv) > 1 else "test.txt"
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+	tweets = CorpusReader(corpus_path).text_txt() * repeat
+	tkn = Tokenizer()
+
+	# per-call path: pattern string passed to re.findall for every tweet
+	start = time.perf_counter()
+	for tweet in tweets:
+		re.findall(tkn.regex_all, tweet)
+	time_single = time.perf_counter() - start
+
+	# streaming path: precompiled master regex
+	start = time.perf_counter()
+	for tweet_tkn in tkn.tokenize_many(tweets):
+		pass
+	time_many = time.perf_counter() - start
+
+	print("tweets: {}".format(len(tweets)))
+	print("re.findall per call: {:.0f} tweets/sec".format(len(tweets)/time_single))
+	print("tokenize_many:       {:.0f} tweets/sec".format(len(tweets)/time_many))
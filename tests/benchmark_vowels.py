@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+import re
+import time
+
+from autosarkasmus.preprocessor.normalizer.normalizer import Normalizer, VOWEL_RUNS, vowel_variants
+
+TOKENS = ["suuuuuuuper", "jaaaaaaaaaa", "neeeeeeeeein", "sooooooooo", "toooooolllll", "gaaaaaanz", "scheiiiiiiße", "Hallooooooo", "wiiiiiiiiirklich", "laaaaaangweeeeeiiiiliiiiig", "Juhuuuuuuuu", "Daaaaaanke", "gooooooooooooooooool", "geiiiiiiiiil", "mooooooaaaaaaaar"]
+
+def shorten_sequential(normalizer, normalized):
+	'''vowel shortening as performed by Normalizer.normalize before candidate generation'''
+	match_vocal = re.findall("[aA]{3,}|[eE]{3,}|[iI]{3,}|[oO]{3,}|[uU]{3,}|[äÄ]{3,}|[üÜ]{3,}|[öÖ]{3,}", normalized)
+	for match in match_vocal:
+		while normalizer.oov(normalized) and len(match) > 0:
+			shortened = match[:-1]
+			normalized = re.sub(match, shortened, normalized)
+			match = shortened
+	return normalized
+
+def shorten_candidates(normalizer, normalized, context):
+	'''vowel shortening as performed by Normalizer.normalize'''
+	if VOWEL_RUNS.search(normalized) and normalizer.oov(normalized):
+		candidates = list(vowel_variants(normalized))
+		known = [candidate for candidate in candidates if not normalizer.oov(candidate)]
+		normalized = max(known or candidates, key=lambda candidate: normalizer.getprob(candidate, context))
+	return normalized
+
+class CountingDictionary:
+	'''counts the dictionary lookups of a hunspell dictionary'''
+	def __init__(self, dictionary):
+		self.dictionary = dictionary
+		self.lookups = 0
+	def spell(self, token):
+		self.lookups += 1
+		return self.dictionary.spell(token)
+
+if __name__ == "__main__":
+	repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+	normalizer = Normalizer(oov_cache_size=0) # no memoization to measure the cost of every call
+	dictionary = CountingDictionary(normalizer.dictionary)
+	normalizer.dictionary = dictionary
+	context = (None, None)
+	for name, shorten in [("sequential shortening", lambda token: shorten_sequential(normalizer, token)), ("candidate generation", lambda token: shorten_candidates(normalizer, token, context))]:
+		dictionary.lookups = 0
+		worst = 0
+		start = time.perf_counter()
+		for i in range(repeat):
+			for token in TOKENS:
+				lookups = dictionary.lookups
+				result = shorten(token)
+				worst = max(worst, dictionary.lookups - lookups)
+		duration = time.perf_counter() - start
+		print("{}: {:.0f} tokens/sec, {:.1f} dictionary lookups/token (worst case {})".format(name, repeat*len(TOKENS)/duration, dictionary.lookups/(repeat*len(TOKENS)), worst))
+	for token in TOKENS:
+		print("\t{} -> {} / {}".format(token, shorten_sequential(normalizer, token), shorten_candidates(normalizer, token, context)))